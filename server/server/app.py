@@ -1,24 +1,47 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask, jsonify, make_response, request, g
+from flask import Flask, Response, jsonify, make_response, request, g, stream_with_context
+from werkzeug.exceptions import HTTPException
 from flask_cors import CORS
 from flask_restful import Api, Resource
 from flask_migrate import Migrate
 from datetime import datetime, date, timedelta
-from sqlalchemy import func
+from sqlalchemy import event, func, select, tuple_, update
+from sqlalchemy.orm import load_only, make_transient_to_detached
 from flask_jwt_extended import (
     JWTManager, create_access_token,
-    jwt_required, get_jwt_identity,
+    jwt_required, get_jwt, get_jwt_identity, get_jwt_request_location,
     set_access_cookies, unset_jwt_cookies
 )
-import bcrypt
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+import base64
+import click
+import hashlib
+import hmac
 import os
 import logging
+import time
 
 from functools import wraps
 
-from models import db, User, Budget, Bill, BillPayment, Expense, Reminder, Category
+from models import db, User, Budget, BudgetState, Bill, BillPayment, Expense, Reminder, Category, DailyExpenseRollup
+from rollups import load_user_budgets, get_monthly_totals, get_spent_since, rebuild_rollups, year_month
+from caching import LRUCache, create_response_cache, request_memo
+from dashboard import build_dashboard
+from versions import get_data_version, bump_data_versions
+from expense_import import read_csv_rows, validate_expense_rows, insert_expenses
+from exports import EXPORT_BATCH_SIZE, EXPORT_FORMATS, stream_rows, export_filename
+from jobs import run_jobs, reconcile_budget_states, BUDGET_ALERT_PERCENT
+from events import create_event_broker
+from passwords import PasswordHasher, PasswordHasherBusy
+from database import engine_options, configure_engines
+from replicas import ReplicaRouter, replica_binds, copy_sqlite_database, create_sticky_store
+from serialization import create_json_provider, default_json_provider
+from compression import ResponseCompressor, encoded_etag
+from fieldsets import EXPENSE_FIELDS, BILL_FIELDS, BUDGET_FIELDS, BUDGET_SPENT_FIELDS
+from instrumentation import RequestMetrics, instrument_engine, gauge_lines, server_timing
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +60,44 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
     JWT_TOKEN_LOCATION = ['headers']  # Just use headers - much simpler!
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))  # 0 disables the cache
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))  # seconds
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')  # memory or redis
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 2048))  # 0 disables the memory backend
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))  # seconds
+    MAX_IMPORT_ROWS = int(os.environ.get('MAX_IMPORT_ROWS', 100000))
+    MAX_BATCH_REQUESTS = int(os.environ.get('MAX_BATCH_REQUESTS', 20))
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'memory')  # memory or redis
+    EVENTS_URL = os.environ.get('EVENTS_URL', 'redis://localhost:6379/0')
+    EVENTS_HEARTBEAT = int(os.environ.get('EVENTS_HEARTBEAT', 15))  # seconds
+    EVENTS_TOKEN_TTL = int(os.environ.get('EVENTS_TOKEN_TTL', 60))  # seconds a stream token can open /events
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))  # waiting operations before 503s
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds waiting for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds; ignored for SQLite
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))  # milliseconds, Postgres only; 0 disables
+    SQLITE_PRAGMAS = os.environ.get('SQLITE_PRAGMAS', 'journal_mode=WAL,synchronous=NORMAL,busy_timeout=5000')
+    DATABASE_REPLICA_URLS = os.environ.get('DATABASE_REPLICA_URLS', '')  # comma-separated; empty reads from the primary
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))  # primary-only reads after a user's write
+    REPLICA_STICKY_BACKEND = os.environ.get('REPLICA_STICKY_BACKEND', 'memory')  # memory or redis
+    REPLICA_STICKY_URL = os.environ.get('REPLICA_STICKY_URL', 'redis://localhost:6379/0')
+    REPLICA_STICKY_SIZE = int(os.environ.get('REPLICA_STICKY_SIZE', 10000))  # recent writers tracked by the memory backend
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'false').lower() == 'true'  # add Server-Timing headers
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', default_json_provider())  # orjson or default
+    JSON_PRETTY = os.environ.get('JSON_PRETTY', 'false').lower() == 'true'  # indented output for debugging
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # bytes; smaller bodies are sent as-is
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))  # gzip 1-9, higher trades CPU for bandwidth
+    BROTLI_LEVEL = int(os.environ.get('BROTLI_LEVEL', 4))  # 0-11, used when the brotli package is installed
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # bearer token for /metrics; empty allows only METRICS_ALLOWED_IPS
+    METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1')  # comma-separated scraper addresses
 
 # Validate required environment variables
 if not Config.JWT_SECRET_KEY:
@@ -44,14 +105,63 @@ if not Config.JWT_SECRET_KEY:
 
 # Apply configuration
 app.config.from_object(Config)
-app.json.compact = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+app.config['SQLALCHEMY_BINDS'] = replica_binds(
+    app.config['DATABASE_REPLICA_URLS'], lambda url: engine_options(url, app.config)
+)
+app.json = create_json_provider(app)
+
+class JWTApi(Api):
+    """Leaves token errors to the flask_jwt_extended handlers below, which answer 401 rather than 500"""
+
+    def handle_error(self, e):
+        if isinstance(e, (JWTExtendedException, PyJWTError)):
+            raise e
+        return super().handle_error(e)
 
 # Initialize extensions
 CORS(app)
 migrate = Migrate(app, db)
 db.init_app(app)
 jwt = JWTManager(app)
-api = Api(app)
+api = JWTApi(app)
+
+# Pragmas and pool usage counters for every configured engine
+with app.app_context():
+    pool_metrics = configure_engines(db.engines, app.config)
+    for engine in db.engines.values():
+        instrument_engine(engine)
+
+# Latency and SQL usage per endpoint, served at /metrics
+request_metrics = RequestMetrics()
+
+# gzip/brotli for JSON, exports and event streams, negotiated per request
+response_compressor = ResponseCompressor(
+    min_size=app.config['COMPRESSION_MIN_SIZE'],
+    gzip_level=app.config['COMPRESSION_LEVEL'],
+    brotli_level=app.config['BROTLI_LEVEL']
+)
+
+# Non-secret columns of recently authenticated users, keyed by user id
+user_cache = LRUCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+# Per-user /dashboard and /insights payloads, keyed on the user's data version
+response_cache = create_response_cache(app.config)
+
+# Sends heavy read-only requests to replicas; stickiness markers get their own store
+replica_router = ReplicaRouter(
+    app.config['SQLALCHEMY_BINDS'], create_sticky_store(app.config), app.config['REPLICA_STICKY_SECONDS']
+)
+
+# Dashboard deltas pushed to /events subscribers by the write paths
+event_broker = create_event_broker(app.config)
+
+# bcrypt work runs here so auth bursts cannot occupy every request thread's CPU
+password_hasher = PasswordHasher(
+    rounds=app.config['BCRYPT_ROUNDS'],
+    max_workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_queue=app.config['PASSWORD_HASH_QUEUE']
+)
 
 # --- Utility Functions ---
 def create_response(data=None, message=None, error=None, status=200):
@@ -65,6 +175,12 @@ def create_response(data=None, message=None, error=None, status=200):
         response['error'] = error
     return make_response(response, status)
 
+def busy_response(retry_after=1):
+    """503 telling the client to retry an auth request shortly"""
+    response = create_response(error='Authentication is busy, please retry shortly', status=503)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
 def validate_required_fields(data, required_fields):
     """Validate that all required fields are present and not empty"""
     if not data:
@@ -81,13 +197,213 @@ def sanitize_input(text):
         return text.strip()
     return text
 
+def get_page_size():
+    """Read the requested page size from ?limit=, clamped to the configured maximum"""
+    limit = request.args.get('limit', type=int)
+    if not limit or limit <= 0:
+        return app.config['DEFAULT_PAGE_SIZE']
+    return min(limit, app.config['MAX_PAGE_SIZE'])
+
+def encode_cursor(*values):
+    """Encode keyset pagination values into an opaque cursor string"""
+    raw = '|'.join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+# Columns kept in user_cache; credentials never enter the process-wide cache
+USER_CACHE_COLUMNS = ('id', 'username', 'email', 'is_demo_user', 'created_at', 'updated_at')
+
+def load_user(user_id):
+    """Load a user by id, served from user_cache when possible"""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        # Attach a copy to this session without emitting a SELECT; other columns load on access
+        snapshot = User(**cached)
+        make_transient_to_detached(snapshot)
+        return db.session.merge(snapshot, load=False)
+
+    user = db.session.get(User, user_id)
+    if user:
+        user_cache.set(user_id, {key: getattr(user, key) for key in USER_CACHE_COLUMNS})
+    return user
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def forget_cached_user(mapper, connection, user):
+    """Drop a user's cached fields as soon as the row changes"""
+    user_cache.delete(user.id)
+
+def make_etag(user_id, version):
+    """Strong ETag for the current request given the user's change counter"""
+    # The day is included because bill statuses and due-day counts change at midnight
+    key = f"{user_id}:{version}:{date.today().isoformat()}:{request.full_path}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def conditional_get(view):
+    """Answer If-None-Match with 304 while the user's data is unchanged"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        current_user = get_current_user()
+        if not current_user:
+            return view(*args, **kwargs)
+
+        g.data_version = request_memo(('data_version', current_user.id), lambda: get_data_version(current_user.id))
+        etag = make_etag(current_user.id, g.data_version)
+        # Strong comparison against the plain ETag and each compressed variant's
+        for candidate in [etag] + [encoded_etag(etag, encoding) for encoding in response_compressor.encodings]:
+            if request.if_none_match.contains(candidate):
+                response = make_response('', 304)
+                response.set_etag(candidate)
+                return response
+
+        response = view(*args, **kwargs)
+        if response.status_code == 200:
+            response.set_etag(etag)
+        return response
+    return wrapper
+
+def replica_read(view):
+    """Run a read-only method against a replica unless the user wrote recently"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        current_user = get_current_user()
+        if current_user:
+            replica_router.use_replica(current_user.id)
+        return view(*args, **kwargs)
+    return wrapper
+
+def metrics_access(view):
+    """Serve worker internals only to allowed addresses or holders of METRICS_TOKEN"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        allowed_ips = {ip.strip() for ip in app.config['METRICS_ALLOWED_IPS'].split(',') if ip.strip()}
+        if request.remote_addr in allowed_ips:
+            return view(*args, **kwargs)
+        token = app.config['METRICS_TOKEN']
+        header = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(header.encode('utf-8'), f"Bearer {token}".encode('utf-8')):
+            return view(*args, **kwargs)
+        return create_response(error='Forbidden', status=403)
+    return wrapper
+
+def build_expense_filters(user_id):
+    """Translate the expense list query string into filters; returns (filters, error)"""
+    category_id = request.args.get('category_id', type=int)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    filters = [Expense.user_id == user_id]
+
+    if category_id:
+        filters.append(Expense.category_id == category_id)
+
+    if start_date:
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            filters.append(Expense.expense_date >= start)
+        except ValueError:
+            return None, 'Invalid start_date format. Use YYYY-MM-DD'
+
+    if end_date:
+        try:
+            end = datetime.strptime(end_date, '%Y-%m-%d').date()
+            filters.append(Expense.expense_date <= end)
+        except ValueError:
+            return None, 'Invalid end_date format. Use YYYY-MM-DD'
+
+    return filters, None
+
+def export_response(stmt, columns, name):
+    """Stream a select statement as CSV or NDJSON chosen by ?format="""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return create_response(error=f"Invalid format. Use one of: {', '.join(EXPORT_FORMATS)}", status=400)
+
+    # yield_per streams rows through a server-side cursor instead of buffering them all
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    response = Response(
+        stream_with_context(stream_rows(result, columns, export_format)),
+        mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(name, export_format)}"'
+    return response
+
+# Endpoints /batch will not run: itself, and the streaming responses
+BATCH_EXCLUDED_ENDPOINTS = {'batch', 'eventstream', 'expensesexport', 'billpaymentsexport'}
+
+def run_batch_get(path, authorization):
+    """Run one /batch GET in the current app context; returns (status, JSON body text)"""
+    if not isinstance(path, str) or not path.startswith('/'):
+        return 400, app.json.dumps({'error': 'Each request must be a path starting with /'})
+
+    # A nested request context reuses the app context and db.session; request_memo
+    # results and the current user are per sub-request
+    with app.test_request_context(path, method='GET', headers={'Authorization': authorization}):
+        if request.endpoint in BATCH_EXCLUDED_ENDPOINTS:
+            return 400, app.json.dumps({'error': 'This endpoint cannot be batched'})
+        g.pop('replica_bind', None)
+        try:
+            response = app.make_response(app.dispatch_request())
+        except HTTPException as e:
+            return e.code, app.json.dumps({'error': e.description})
+        body = response.get_data(as_text=True)
+        if not response.is_json:
+            # Plain-text endpoints (/, /metrics) come back as a JSON string
+            return response.status_code, app.json.dumps(body)
+        return response.status_code, body.strip() or 'null'
+
+def publish_after_commit(publish, *args):
+    """Publish events for a write that is already committed; failures are logged, never turned into a 500"""
+    try:
+        publish(*args)
+    except Exception as e:
+        logger.error(f"Error publishing event: {str(e)}")
+
+def publish_budget_thresholds(user_id, category_id, amount):
+    """Publish budget_threshold when a new expense pushes its budget past an alert level"""
+    budget = Budget.query.filter_by(user_id=user_id, category_id=category_id).first()
+    if not budget:
+        return
+
+    budgeted = float(budget.budgeted_amount)
+    spent_after = float(budget.spent_amount)
+    spent_before = spent_after - amount
+    for percent in (BUDGET_ALERT_PERCENT, 100):
+        limit = budgeted * percent / 100
+        if spent_before < limit <= spent_after:
+            event_broker.publish(user_id, 'budget_threshold', {
+                'budget_id': budget.id,
+                'category_id': category_id,
+                'threshold_percent': percent,
+                'spent_amount': spent_after,
+                'budgeted_amount': budgeted
+            })
+
+# Where get_current_user keeps its result. It lives on the request rather than g,
+# because /batch sub-requests, tests and CLI commands can share one app context.
+CURRENT_USER_KEY = 'budgetwise.current_user'
+
 def get_current_user():
-    """Helper function to get current user from JWT token"""
+    """Helper function to get current user from JWT token, loaded once per request"""
+    if CURRENT_USER_KEY in request.environ:
+        return request.environ[CURRENT_USER_KEY]
     try:
-        current_user_email = get_jwt_identity()
-        if not current_user_email:
-            return None
-        user = User.query.filter_by(email=current_user_email).first()
+        user_id = get_jwt().get('uid')
+        if user_id is not None:
+            user = load_user(user_id)
+        else:
+            # Tokens issued before the uid claim only carry the email
+            current_user_email = get_jwt_identity()
+            if not current_user_email:
+                return None
+            user = User.query.filter_by(email=current_user_email).first()
+        request.environ[CURRENT_USER_KEY] = user
         return user
     except Exception as e:
         logger.error(f"Error getting current user: {str(e)}")
@@ -95,6 +411,18 @@ def get_current_user():
 
 
 
+# POST endpoints that only read, and so must not start a read-your-writes window
+READ_ONLY_POST_ENDPOINTS = {'batch', 'eventstreamtoken'}
+
+@app.after_request
+def keep_writers_on_primary(response):
+    """Start a user's read-your-writes window after any successful write"""
+    current_user = request.environ.get(CURRENT_USER_KEY)
+    if (current_user and request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400
+            and request.endpoint not in READ_ONLY_POST_ENDPOINTS):
+        replica_router.mark_write(current_user.id)
+    return response
+
 # --- JWT Error Handlers ---
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
@@ -108,7 +436,23 @@ def invalid_token_callback(error):
 def missing_token_callback(error):
     return create_response(error='Authentication required', status=401)
 
+# Scope claim of the short-lived tokens that open /events (see EventStreamToken)
+EVENTS_TOKEN_SCOPE = 'events'
+
+@jwt.token_verification_loader
+def verify_token_scope(jwt_header, jwt_payload):
+    """Stream tokens only open /events; they are not general access tokens"""
+    return jwt_payload.get('scope') != EVENTS_TOKEN_SCOPE or request.endpoint == 'eventstream'
+
+@jwt.token_verification_failed_loader
+def token_scope_callback(jwt_header, jwt_payload):
+    return create_response(error='Token not valid for this endpoint', status=401)
+
 # --- Request Handlers ---
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
 @app.before_request
 def before_request_load_user():
     """Skip authentication for public endpoints"""
@@ -116,11 +460,62 @@ def before_request_load_user():
     if request.endpoint in public_endpoints:
         return
 
+@app.after_request
+def compress_response(response):
+    """Compress the body when the client accepts gzip or brotli"""
+    if app.config['COMPRESSION_ENABLED']:
+        return response_compressor.compress(request, response)
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency and SQL usage; the URL rule keeps ids out of the endpoint label"""
+    if 'request_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    queries, db_seconds = g.get('sql_queries', 0), g.get('sql_seconds', 0.0)
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_metrics.observe(request.method, endpoint, response.status_code, elapsed, queries, db_seconds)
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = server_timing(elapsed, queries, db_seconds)
+    return response
+
 # --- Routes ---
 @app.route('/')
 def hello():
     return "Budget App API - v1.0"
 
+@app.route('/metrics')
+@metrics_access
+def metrics():
+    """Prometheus metrics for this worker process"""
+    lines = request_metrics.render()
+    pools = {key: stats.stats() for key, stats in pool_metrics.items()}
+    lines += gauge_lines('db_connections_checked_out', 'Connections currently checked out of the pool', {
+        f'bind="{key}"': stats['checked_out'] for key, stats in pools.items()
+    })
+    lines += gauge_lines('db_connections_max_checked_out', 'Most connections checked out at once', {
+        f'bind="{key}"': stats['max_checked_out'] for key, stats in pools.items()
+    })
+    hashing = password_hasher.stats()
+    lines += gauge_lines('password_hash_seconds_average', 'Average bcrypt operation time', {'': hashing['average_seconds']})
+    lines += gauge_lines('password_hash_in_flight', 'bcrypt operations running or queued', {'': hashing['in_flight']})
+    lines += gauge_lines('password_hash_rejected_total', 'bcrypt operations refused because the queue was full',
+                         {'': hashing['rejected']}, kind='counter')
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/auth')
+@metrics_access
+def auth_metrics():
+    """Password hashing cost and pool pressure"""
+    return jsonify(password_hasher.stats())
+
+@app.route('/metrics/db')
+@metrics_access
+def db_metrics():
+    """Connection pool usage per engine, for sizing workers against DB connections"""
+    return jsonify({key: metrics.stats() for key, metrics in pool_metrics.items()})
+
 # --- Authentication Resources ---
 class Register(Resource):
     def post(self):
@@ -144,14 +539,17 @@ class Register(Resource):
                 return create_response(error='Username already taken', status=400)
 
             # Create user
-            hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+            hashed = password_hasher.hash(password)
             new_user = User(email=email, username=username, password_hash=hashed)
             db.session.add(new_user)
             db.session.commit()
 
             logger.info(f"New user registered: {username}")
             return create_response(message='User created successfully', status=201)
-            
+
+        except PasswordHasherBusy:
+            db.session.rollback()
+            return busy_response()
         except Exception as e:
             logger.error(f"Registration error: {str(e)}")
             db.session.rollback()
@@ -170,8 +568,8 @@ class Login(Resource):
             email = sanitize_input(data["email"])
 
             user = User.query.filter_by(email=email).first()
-            if user and bcrypt.checkpw(password.encode('utf-8'), user.password_hash):
-                access_token = create_access_token(identity=email)
+            if user and password_hasher.verify(password, user.password_hash):
+                access_token = create_access_token(identity=email, additional_claims={'uid': user.id})
                 
                 logger.info(f"User logged in: {user.username}")
                 return create_response(
@@ -186,7 +584,9 @@ class Login(Resource):
             
             logger.warning(f"Failed login attempt for email: {email}")
             return create_response(error='Invalid credentials', status=401)
-            
+
+        except PasswordHasherBusy:
+            return busy_response()
         except Exception as e:
             logger.error(f"Login error: {str(e)}")
             return create_response(error='Login failed', status=500)
@@ -216,8 +616,7 @@ class Categories(Resource):
     
     def get(self):
         try:
-            categories = Category.query.order_by(Category.name).all()
-            categories_data = [cat.to_dict() for cat in categories]
+            categories_data = Category.all_cached()
             return create_response(data={'categories': categories_data})
         except Exception as e:
             logger.error(f"Error fetching categories: {str(e)}")
@@ -237,6 +636,7 @@ class Categories(Resource):
             )
             db.session.add(category)
             db.session.commit()
+            Category.invalidate_cache()
 
             logger.info(f"Category created: {category.name}")
             return create_response(data=category.to_dict(), status=201)
@@ -252,14 +652,29 @@ class Categories(Resource):
 # --- Budgets Resource ---
 class Budgets(Resource):
     @jwt_required()
+    @conditional_get
     def get(self):
         try:
             current_user = get_current_user()
             if not current_user:
                 return create_response(error='User not found', status=404)
             
-            budgets = Budget.query.filter_by(user_id=current_user.id).all()
-            budgets_data = [budget.to_dict() for budget in budgets]
+            fields, error = BUDGET_FIELDS.parse()
+            if error:
+                return create_response(error=error, status=400)
+
+            user_budgets = lambda: request_memo(('budgets', current_user.id), lambda: load_user_budgets(current_user.id))
+            if fields is None:
+                budgets_data = [budget.to_dict() for budget in user_budgets()]
+            else:
+                if BUDGET_SPENT_FIELDS.intersection(fields):
+                    budgets = user_budgets()
+                else:
+                    # No spent totals requested: skip the rollup join entirely
+                    budgets = Budget.query.filter_by(user_id=current_user.id).options(
+                        load_only(*BUDGET_FIELDS.columns(fields))
+                    ).order_by(Budget.id).all()
+                budgets_data = [BUDGET_FIELDS.serialize(budget, fields) for budget in budgets]
             return create_response(data={'budgets': budgets_data})
         except Exception as e:
             logger.error(f"Error fetching budgets: {str(e)}")
@@ -312,9 +727,12 @@ class Budgets(Resource):
             
             db.session.add(budget)
             db.session.commit()
+
+            budget_data = budget.to_dict()
+            publish_after_commit(event_broker.publish, current_user.id, 'budget_created', budget_data)
             
             logger.info(f"Budget created for user {current_user.username}, category {category.name}")
-            return create_response(data=budget.to_dict(), status=201)
+            return create_response(data=budget_data, status=201)
             
         except Exception as e:
             db.session.rollback()
@@ -324,48 +742,60 @@ class Budgets(Resource):
 # --- Expenses Resource ---
 class Expenses(Resource):
     @jwt_required()
+    @replica_read
+    @conditional_get
     def get(self):
         try:
             current_user = get_current_user()
             if not current_user:
                 return create_response(error='User not found', status=404)
                 
-            category_id = request.args.get('category_id', type=int)
-            start_date = request.args.get('start_date')
-            end_date = request.args.get('end_date')
-            limit = request.args.get('limit', type=int)
-
-            query = Expense.query.filter_by(user_id=current_user.id)
-
-            if category_id:
-                query = query.filter_by(category_id=category_id)
-
-            if start_date:
-                try:
-                    start = datetime.strptime(start_date, '%Y-%m-%d').date()
-                    query = query.filter(Expense.expense_date >= start)
-                except ValueError:
-                    return create_response(error='Invalid start_date format. Use YYYY-MM-DD', status=400)
-
-            if end_date:
+            filters, error = build_expense_filters(current_user.id)
+            if error:
+                return create_response(error=error, status=400)
+            fields, error = EXPENSE_FIELDS.parse()
+            if error:
+                return create_response(error=error, status=400)
+            cursor = request.args.get('cursor')
+            page_size = get_page_size()
+
+            # Totals cover the whole filter, not just the returned page
+            count, total_amount = db.session.query(
+                func.count(Expense.id),
+                func.sum(Expense.amount)
+            ).filter(*filters).one()
+
+            # Plain column rows: no ORM objects are built, and categories come from Category.get_cached
+            if fields is None:
+                columns, serialize = Expense.list_columns(), Expense.row_to_dict
+            else:
+                columns = EXPENSE_FIELDS.columns(fields, always=('id', 'expense_date'))
+                serialize = lambda row: EXPENSE_FIELDS.serialize(row, fields)
+            query = db.session.query(*columns).filter(*filters)
+
+            # Keyset pagination on (expense_date, id), served by idx_user_date
+            if cursor:
                 try:
-                    end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                    query = query.filter(Expense.expense_date <= end)
+                    cursor_date, cursor_id = decode_cursor(cursor)
+                    cursor_key = (datetime.strptime(cursor_date, '%Y-%m-%d').date(), int(cursor_id))
                 except ValueError:
-                    return create_response(error='Invalid end_date format. Use YYYY-MM-DD', status=400)
-
-            query = query.order_by(Expense.expense_date.desc())
+                    return create_response(error='Invalid cursor', status=400)
+                query = query.filter(tuple_(Expense.expense_date, Expense.id) < cursor_key)
 
-            if limit and limit > 0:
-                query = query.limit(limit)
+            query = query.order_by(Expense.expense_date.desc(), Expense.id.desc())
+            expenses = query.limit(page_size + 1).all()
 
-            expenses = query.all()
-            total_amount = sum(float(exp.amount) for exp in expenses)
+            next_cursor = None
+            if len(expenses) > page_size:
+                expenses = expenses[:page_size]
+                last = expenses[-1]
+                next_cursor = encode_cursor(last.expense_date.isoformat(), last.id)
 
             data = {
-                'expenses': [exp.to_dict() for exp in expenses],
-                'count': len(expenses),
-                'total_amount': total_amount
+                'expenses': [serialize(row) for row in expenses],
+                'count': count,
+                'total_amount': float(total_amount or 0),
+                'next_cursor': next_cursor
             }
 
             return create_response(data=data)
@@ -416,17 +846,100 @@ class Expenses(Resource):
             db.session.add(expense)
             db.session.commit()
 
+            expense_data = expense.to_dict()
+            publish_after_commit(event_broker.publish, current_user.id, 'expense_created', expense_data)
+            publish_after_commit(publish_budget_thresholds, current_user.id, expense.category_id, amount)
+
             logger.info(f"Expense created for user {current_user.username}: {expense.description}")
-            return create_response(data=expense.to_dict(), status=201)
+            return create_response(data=expense_data, status=201)
             
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error creating expense: {str(e)}")
             return create_response(error='Failed to create expense', status=500)
 
+# --- Expense Export Resource ---
+class ExpensesExport(Resource):
+    @jwt_required()
+    @replica_read
+    def get(self):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+
+            filters, error = build_expense_filters(current_user.id)
+            if error:
+                return create_response(error=error, status=400)
+
+            columns = ['id', 'expense_date', 'category', 'description', 'amount', 'created_at']
+            stmt = select(
+                Expense.id, Expense.expense_date, Category.name, Expense.description,
+                Expense.amount, Expense.created_at
+            ).join(Category, Category.id == Expense.category_id).where(
+                *filters
+            ).order_by(Expense.expense_date.desc(), Expense.id.desc())
+
+            logger.info(f"Expense export started for user {current_user.username}")
+            return export_response(stmt, columns, 'expenses')
+        except Exception as e:
+            logger.error(f"Error exporting expenses: {str(e)}")
+            return create_response(error='Failed to export expenses', status=500)
+
+# --- Bulk Expenses Resource ---
+class ExpensesBulk(Resource):
+    @jwt_required()
+    def post(self):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+
+            # Accept a CSV upload, a raw CSV body, or a JSON array (optionally under "expenses")
+            if 'file' in request.files or request.mimetype == 'text/csv':
+                data = request.files['file'].read() if 'file' in request.files else request.get_data()
+                try:
+                    rows = read_csv_rows(data)
+                except UnicodeDecodeError:
+                    return create_response(error='CSV data must be UTF-8 encoded', status=400)
+            else:
+                data = request.get_json(silent=True)
+                rows = data.get('expenses') if isinstance(data, dict) else data
+                if not isinstance(rows, list):
+                    return create_response(error='Expected a JSON array of expenses or CSV data', status=400)
+
+            if not rows:
+                return create_response(error='No data provided', status=400)
+            if len(rows) > app.config['MAX_IMPORT_ROWS']:
+                return create_response(error=f"At most {app.config['MAX_IMPORT_ROWS']} rows can be imported at once", status=413)
+
+            expenses, errors = validate_expense_rows(rows, current_user.id)
+
+            # Nothing is written when a row is invalid, unless ?skip_invalid=true
+            skip_invalid = request.args.get('skip_invalid', 'false').lower() == 'true'
+            if errors and not skip_invalid:
+                return make_response({'error': 'Some rows are invalid', 'data': {'errors': errors}}, 400)
+
+            created = insert_expenses(expenses) if expenses else 0
+            db.session.commit()
+            if created:
+                publish_after_commit(event_broker.publish, current_user.id, 'expenses_imported', {'created': created})
+
+            logger.info(f"Imported {created} expenses for user {current_user.username} ({len(errors)} skipped)")
+            return create_response(
+                data={'created': created, 'skipped': len(errors), 'errors': errors},
+                status=201
+            )
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error importing expenses: {str(e)}")
+            return create_response(error='Failed to import expenses', status=500)
+
 # --- Bills Resource ---
 class Bills(Resource):
     @jwt_required()
+    @conditional_get
     def get(self):
         try:
             current_user = get_current_user()
@@ -435,21 +948,50 @@ class Bills(Resource):
                  
             status = request.args.get('status')
             category = request.args.get('category')
-            
-            query = Bill.query.filter_by(user_id=current_user.id)
-            
+            cursor = request.args.get('cursor')
+            page_size = get_page_size()
+
+            fields, error = BILL_FIELDS.parse()
+            if error:
+                return create_response(error=error, status=400)
+
+            filters = [Bill.user_id == current_user.id]
+
             if category:
-                query = query.filter_by(category=category)
-            
-            bills = query.order_by(Bill.due_date.asc()).all()
-            
-            # Filter by status if specified
+                filters.append(Bill.category == category)
+
             if status:
-                bills = [bill for bill in bills if bill.status == status]
-            
+                if status not in Bill.STATUSES:
+                    return create_response(error=f"Invalid status. Use one of: {', '.join(Bill.STATUSES)}", status=400)
+                filters.append(Bill.status_filter(status))
+
+            count = db.session.query(func.count(Bill.id)).filter(*filters).scalar()
+
+            query = Bill.query.filter(*filters)
+            if fields is not None:
+                query = query.options(load_only(*BILL_FIELDS.columns(fields, always=('id', 'due_date'))))
+
+            # Keyset pagination on (due_date, id)
+            if cursor:
+                try:
+                    cursor_date, cursor_id = decode_cursor(cursor)
+                    cursor_key = (datetime.strptime(cursor_date, '%Y-%m-%d').date(), int(cursor_id))
+                except ValueError:
+                    return create_response(error='Invalid cursor', status=400)
+                query = query.filter(tuple_(Bill.due_date, Bill.id) > cursor_key)
+
+            bills = query.order_by(Bill.due_date.asc(), Bill.id.asc()).limit(page_size + 1).all()
+
+            next_cursor = None
+            if len(bills) > page_size:
+                bills = bills[:page_size]
+                last = bills[-1]
+                next_cursor = encode_cursor(last.due_date.isoformat(), last.id)
+
             data = {
-                'bills': [bill.to_dict() for bill in bills],
-                'count': len(bills)
+                'bills': [bill.to_dict() if fields is None else BILL_FIELDS.serialize(bill, fields) for bill in bills],
+                'count': count,
+                'next_cursor': next_cursor
             }
 
             return create_response(data=data)
@@ -496,8 +1038,11 @@ class Bills(Resource):
             db.session.add(bill)
             db.session.commit()
 
+            bill_data = bill.to_dict()
+            publish_after_commit(event_broker.publish, current_user.id, 'bill_created', bill_data)
+
             logger.info(f"Bill created for user {current_user.username}: {bill.name}")
-            return create_response(data=bill.to_dict(), status=201)
+            return create_response(data=bill_data, status=201)
 
         except Exception as e:
             db.session.rollback()
@@ -558,8 +1103,11 @@ class BillsById(Resource):
                 bill.recurring_type = data['recurring_type']
             
             db.session.commit()
+
+            bill_data = bill.to_dict()
+            publish_after_commit(event_broker.publish, current_user.id, 'bill_updated', bill_data)
             logger.info(f"Bill updated for user {current_user.username}: {bill.name}")
-            return create_response(data=bill.to_dict())
+            return create_response(data=bill_data)
             
         except Exception as e:
             db.session.rollback()
@@ -580,6 +1128,7 @@ class BillsById(Resource):
             bill_name = bill.name
             db.session.delete(bill)
             db.session.commit()
+            publish_after_commit(event_broker.publish, current_user.id, 'bill_deleted', {'id': bill_id})
             
             logger.info(f"Bill deleted for user {current_user.username}: {bill_name}")
             return create_response(message='Bill deleted successfully')
@@ -628,6 +1177,8 @@ class PayBills(Resource):
             if next_bill:
                 response_data['next_bill'] = next_bill.to_dict()
                 message += f' and next {bill.recurring_type} bill created'
+
+            publish_after_commit(event_broker.publish, current_user.id, 'bill_paid', response_data)
             
             logger.info(f"Bill paid for user {current_user.username}: {bill.name}")
             return create_response(data=response_data, message=message)
@@ -640,6 +1191,8 @@ class PayBills(Resource):
 # --- Bill Payments Resource ---
 class BillPayments(Resource):
     @jwt_required()
+    @replica_read
+    @conditional_get
     def get(self):
         try:
             current_user = get_current_user()
@@ -666,65 +1219,201 @@ class BillPayments(Resource):
             logger.error(f"Error fetching bill payments: {str(e)}")
             return create_response(error='Failed to fetch bill payments', status=500)
 
-# --- Dashboard Resource ---
-class Dashboards(Resource):
+# --- Bill Payments Export Resource ---
+class BillPaymentsExport(Resource):
     @jwt_required()
+    @replica_read
     def get(self):
         try:
             current_user = get_current_user()
             if not current_user:
                 return create_response(error='User not found', status=404)
-                
-            today = date.today()
-            thirty_days_ago = today - timedelta(days=30)
-            start_of_month = today.replace(day=1)
-
-            budgets = Budget.query.filter_by(user_id=current_user.id).all()
-
-            recent_expenses = Expense.query.filter(
-                Expense.user_id == current_user.id,
-                Expense.expense_date >= thirty_days_ago
-            ).order_by(Expense.expense_date.desc()).limit(10).all()
-
-            month_expenses = Expense.query.filter(
-                Expense.user_id == current_user.id,
-                Expense.expense_date >= start_of_month
-            ).all()
-
-            upcoming_bills = Bill.query.filter(
-                Bill.user_id == current_user.id,
-                Bill.paid_date.is_(None),
-                Bill.due_date >= today,
-                Bill.due_date <= today + timedelta(days=7)
-            ).all()
-
-            overdue_bills = Bill.query.filter(
-                Bill.user_id == current_user.id,
-                Bill.paid_date.is_(None),
-                Bill.due_date < today
-            ).all()
-
-            # Calculate totals
-            total_budgeted = sum(float(budget.budgeted_amount) for budget in budgets)
-            total_spent_budgets = sum(float(budget.spent_amount) for budget in budgets)
-            month_expense_total = sum(float(expense.amount) for expense in month_expenses)
+
+            columns = ['id', 'bill_id', 'bill_name', 'category', 'amount', 'original_due_date', 'paid_date', 'created_at']
+            stmt = select(
+                BillPayment.id, BillPayment.bill_id, BillPayment.bill_name, BillPayment.category,
+                BillPayment.amount, BillPayment.original_due_date, BillPayment.paid_date, BillPayment.created_at
+            ).where(
+                BillPayment.user_id == current_user.id
+            ).order_by(BillPayment.paid_date.desc(), BillPayment.id.desc())
+
+            logger.info(f"Bill payment export started for user {current_user.username}")
+            return export_response(stmt, columns, 'bill-payments')
+        except Exception as e:
+            logger.error(f"Error exporting bill payments: {str(e)}")
+            return create_response(error='Failed to export bill payments', status=500)
+
+# --- Reminders Resource ---
+class Reminders(Resource):
+    @jwt_required()
+    @conditional_get
+    def get(self):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+
+            # Active feed by default; ?active=false lists dismissed reminders
+            is_active = request.args.get('active', 'true').lower() != 'false'
+            cursor = request.args.get('cursor')
+            page_size = get_page_size()
+
+            # Served by idx_user_active (user_id, is_active)
+            query = Reminder.query.filter(
+                Reminder.user_id == current_user.id,
+                Reminder.is_active.is_(is_active)
+            )
+
+            if cursor:
+                try:
+                    cursor_id = int(decode_cursor(cursor)[0])
+                except ValueError:
+                    return create_response(error='Invalid cursor', status=400)
+                query = query.filter(Reminder.id < cursor_id)
+
+            reminders = query.order_by(Reminder.id.desc()).limit(page_size + 1).all()
+
+            next_cursor = None
+            if len(reminders) > page_size:
+                reminders = reminders[:page_size]
+                next_cursor = encode_cursor(reminders[-1].id)
 
             data = {
-                'user': current_user.to_dict(),
-                'summary': {
-                    'total_budgeted': total_budgeted,
-                    'total_spent_budgets': total_spent_budgets,
-                    'budget_utilization': (total_spent_budgets / total_budgeted * 100) if total_budgeted > 0 else 0,
-                    'month_expenses_total': month_expense_total,
-                    'overdue_bills_count': len(overdue_bills),
-                    'overdue_bills_amount': sum(float(bill.amount) for bill in overdue_bills),
-                    'upcoming_bills_count': len(upcoming_bills),
-                },
-                'budgets': [budget.to_dict() for budget in budgets],
-                'recent_expenses': [expense.to_dict() for expense in recent_expenses],
-                'overdue_bills': [bill.to_dict() for bill in overdue_bills],
-                'upcoming_bills': [bill.to_dict() for bill in upcoming_bills],
+                'reminders': [reminder.to_dict() for reminder in reminders],
+                'next_cursor': next_cursor
             }
+            return create_response(data=data)
+        except Exception as e:
+            logger.error(f"Error fetching reminders: {str(e)}")
+            return create_response(error='Failed to fetch reminders', status=500)
+
+class DismissReminder(Resource):
+    @jwt_required()
+    def post(self, reminder_id):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+
+            reminder = Reminder.query.filter_by(id=reminder_id, user_id=current_user.id).first()
+            if not reminder:
+                return create_response(error='Reminder not found', status=404)
+
+            if reminder.is_active:
+                reminder.dismiss()
+                db.session.commit()
+
+            return create_response(data=reminder.to_dict(), message='Reminder dismissed')
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error dismissing reminder: {str(e)}")
+            return create_response(error='Failed to dismiss reminder', status=500)
+
+class DismissReminders(Resource):
+    @jwt_required()
+    def post(self):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+
+            # Either {"ids": [...]}, {"reminder_type": "..."} or {"all": true}
+            data = request.get_json() or {}
+            conditions = [Reminder.user_id == current_user.id, Reminder.is_active.is_(True)]
+
+            if data.get('ids') is not None:
+                try:
+                    # A string would otherwise be iterated one character at a time
+                    if not isinstance(data['ids'], list):
+                        raise TypeError('ids must be a list')
+                    ids = [int(reminder_id) for reminder_id in data['ids']]
+                except (ValueError, TypeError):
+                    return create_response(error='ids must be a list of integers', status=400)
+                conditions.append(Reminder.id.in_(ids))
+            elif data.get('reminder_type'):
+                conditions.append(Reminder.reminder_type == data['reminder_type'])
+            elif not data.get('all'):
+                return create_response(error='Provide ids, reminder_type or all', status=400)
+
+            # One UPDATE instead of loading and dismissing each reminder
+            dismissed = db.session.execute(
+                update(Reminder).where(*conditions).values(is_active=False, dismissed_at=datetime.utcnow())
+            ).rowcount
+            if dismissed:
+                bump_data_versions(db.session.connection(), {current_user.id})
+            db.session.commit()
+
+            return create_response(data={'dismissed': dismissed}, message=f'{dismissed} reminders dismissed')
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error dismissing reminders: {str(e)}")
+            return create_response(error='Failed to dismiss reminders', status=500)
+
+# --- Event Stream Resource ---
+class EventStreamToken(Resource):
+    @jwt_required()
+    def post(self):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+
+            # Only good for opening /events, and expires quickly, since it travels in the URL
+            token = create_access_token(
+                identity=current_user.email,
+                additional_claims={'uid': current_user.id, 'scope': EVENTS_TOKEN_SCOPE},
+                expires_delta=timedelta(seconds=app.config['EVENTS_TOKEN_TTL'])
+            )
+            return create_response(data={'token': token, 'expires_in': app.config['EVENTS_TOKEN_TTL']})
+        except Exception as e:
+            logger.error(f"Error issuing event stream token: {str(e)}")
+            return create_response(error='Failed to issue event stream token', status=500)
+
+class EventStream(Resource):
+    # EventSource cannot set headers, so a stream token from POST /events/token may come from ?jwt=
+    @jwt_required(locations=['headers', 'query_string'])
+    def get(self):
+        try:
+            # Access tokens stay out of URLs (and so out of access logs)
+            if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != EVENTS_TOKEN_SCOPE:
+                return create_response(error='Use a stream token from POST /events/token in the query string', status=401)
+
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+            user_id = current_user.id
+
+            # The stream never touches the database; release the connection now
+            db.session.close()
+
+            response = Response(
+                stream_with_context(event_broker.stream(user_id, app.config['EVENTS_HEARTBEAT'])),
+                mimetype='text/event-stream'
+            )
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+        except Exception as e:
+            logger.error(f"Error opening event stream: {str(e)}")
+            return create_response(error='Failed to open event stream', status=500)
+
+# --- Dashboard Resource ---
+class Dashboards(Resource):
+    @jwt_required()
+    @replica_read
+    @conditional_get
+    def get(self):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+                
+            # Keyed by day as well, since overdue/upcoming shift at midnight
+            data = response_cache.get_or_build(
+                'dashboard', current_user.id, g.data_version,
+                lambda: build_dashboard(current_user),
+                variant=date.today().isoformat()
+            )
 
             return create_response(data=data)
 
@@ -735,95 +1424,19 @@ class Dashboards(Resource):
 # --- Insights Resource ---
 class Insights(Resource):
     @jwt_required()
+    @replica_read
+    @conditional_get
     def get(self):
         try:
             current_user = get_current_user()
             if not current_user:
                 return create_response(error='User not found', status=404)
                 
-            today = date.today()
-            start_of_month = today.replace(day=1)
-            start_of_last_month = (start_of_month - timedelta(days=1)).replace(day=1)
-            end_of_last_month = start_of_month - timedelta(days=1)
-            last_30_days = today - timedelta(days=30)
-
-            # Budget Utilization
-            total_budgeted = db.session.query(func.sum(Budget.budgeted_amount)).filter(Budget.user_id == current_user.id).scalar() or 0
-            total_spent_budgets = db.session.query(func.sum(Expense.amount)).filter(
-                Expense.user_id == current_user.id,
-                Expense.expense_date >= start_of_month
-
-            ).scalar() or 0
-            budget_utilization = (total_spent_budgets / total_budgeted * 100) if total_budgeted > 0 else 0
-
-            # Spending by Category
-            category_spending = db.session.query(
-                Category.name,
-                func.sum(Expense.amount)
-            ).join(Expense).filter(
-                Expense.user_id == current_user.id
-            ).group_by(Category.name).all()
-            category_spending_data = [
-                {"category": name, "total_spent": float(total)} for name, total in category_spending
-            ]
-
-            # Spending Over Time (last 30 days)
-            daily_spending = db.session.query(
-                Expense.expense_date,
-                func.sum(Expense.amount)
-            ).filter(
-                Expense.user_id == current_user.id,
-                Expense.expense_date >= last_30_days
-            ).group_by(Expense.expense_date).order_by(Expense.expense_date).all()
-            spending_timeline = [
-                {"date": str(date), "amount": float(amount)} for date, amount in daily_spending
-            ]
-
-            
-            # Bills Summary
-            upcoming_bills_count = Bill.query.filter(
-                Bill.user_id == current_user.id,
-                Bill.paid_date.is_(None),
-                Bill.due_date >= today
-            ).count()
-            overdue_bills = Bill.query.filter(
-                Bill.user_id == current_user.id,
-                Bill.due_date < today
-            ).all()
-            overdue_bills_count = len(overdue_bills)
-            overdue_bills_amount = sum(float(bill.amount) for bill in overdue_bills)
-
-
-             # Monthly Comparison
-            this_month_spending = db.session.query(func.sum(Expense.amount)).filter(
-                Expense.user_id == current_user.id,
-                Expense.expense_date >= start_of_month
-            ).scalar() or 0
-            last_month_spending = db.session.query(func.sum(Expense.amount)).filter(
-                Expense.user_id == current_user.id,
-                Expense.expense_date >= start_of_last_month,
-                Expense.expense_date <= end_of_last_month
-            ).scalar() or 0
-
-            
-            insights_data = {
-                "budget_utilization": {
-                    "total_budgeted": float(total_budgeted),
-                    "total_spent": float(total_spent_budgets),
-                    "utilization_percent": round(budget_utilization, 2)
-                },
-                "category_spending": category_spending_data,
-                "spending_timeline": spending_timeline,
-                "bills_summary": {
-                    "upcoming_bills_count": upcoming_bills_count,
-                    "overdue_bills_count": overdue_bills_count,
-                    "overdue_bills_amount": round(overdue_bills_amount, 2)
-                },
-                "monthly_comparison": {
-                    "this_month_spending": float(this_month_spending),
-                    "last_month_spending": float(last_month_spending)
-                }
-            }
+            insights_data = response_cache.get_or_build(
+                'insights', current_user.id, g.data_version,
+                lambda: self.build_insights(current_user),
+                variant=date.today().isoformat()
+            )
 
             return create_response(data=insights_data, status=200)
 
@@ -831,10 +1444,165 @@ class Insights(Resource):
         except Exception as e:
             return create_response(error=str(e), status=500)
 
+    def build_insights(self, current_user):
+        today = date.today()
+        start_of_month = today.replace(day=1)
+        start_of_last_month = (start_of_month - timedelta(days=1)).replace(day=1)
+        this_month = year_month(start_of_month)
+        last_month = year_month(start_of_last_month)
+        last_30_days = today - timedelta(days=30)
+
+        # Monthly totals come from the pre-aggregated rollup tables; like the
+        # expense_date >= start_of_month filter they replace, "this month"
+        # also counts expenses already entered for later months
+        this_month_spending = get_spent_since(current_user.id, this_month)
+        last_month_spending = get_monthly_totals(current_user.id, [last_month])[last_month]
+
+        # Budget Utilization
+        total_budgeted = db.session.query(func.sum(Budget.budgeted_amount)).filter(Budget.user_id == current_user.id).scalar() or 0
+        total_spent_budgets = this_month_spending
+        budget_utilization = (total_spent_budgets / total_budgeted * 100) if total_budgeted > 0 else 0
+
+        # Spending by Category
+        category_spending = db.session.query(
+            Category.name,
+            BudgetState.spent_amount
+        ).join(BudgetState, BudgetState.category_id == Category.id).filter(
+            BudgetState.user_id == current_user.id
+        ).order_by(Category.name).all()
+        category_spending_data = [
+            {"category": name, "total_spent": float(total)} for name, total in category_spending
+        ]
+
+        # Spending Over Time (last 30 days)
+        daily_spending = db.session.query(
+            DailyExpenseRollup.expense_date,
+            DailyExpenseRollup.total_amount
+        ).filter(
+            DailyExpenseRollup.user_id == current_user.id,
+            DailyExpenseRollup.expense_date >= last_30_days
+        ).order_by(DailyExpenseRollup.expense_date).all()
+        spending_timeline = [
+            {"date": str(date), "amount": float(amount)} for date, amount in daily_spending
+        ]
+
+
+        # Bills Summary
+        upcoming_bills_count = Bill.query.filter(
+            Bill.user_id == current_user.id,
+            Bill.paid_date.is_(None),
+            Bill.due_date >= today
+        ).count()
+        overdue_bills = Bill.query.filter(
+            Bill.user_id == current_user.id,
+            Bill.is_overdue
+        ).all()
+        overdue_bills_count = len(overdue_bills)
+        overdue_bills_amount = sum(float(bill.amount) for bill in overdue_bills)
+
+
+        insights_data = {
+            "budget_utilization": {
+                "total_budgeted": float(total_budgeted),
+                "total_spent": float(total_spent_budgets),
+                "utilization_percent": round(budget_utilization, 2)
+            },
+            "category_spending": category_spending_data,
+            "spending_timeline": spending_timeline,
+            "bills_summary": {
+                "upcoming_bills_count": upcoming_bills_count,
+                "overdue_bills_count": overdue_bills_count,
+                "overdue_bills_amount": round(overdue_bills_amount, 2)
+            },
+            "monthly_comparison": {
+                "this_month_spending": float(this_month_spending),
+                "last_month_spending": float(last_month_spending)
+            }
+        }
+        return insights_data
+
+
 
 
 
 
+# --- Batch Resource ---
+class Batch(Resource):
+    @jwt_required()
+    def post(self):
+        try:
+            current_user = get_current_user()
+            if not current_user:
+                return create_response(error='User not found', status=404)
+
+            data = request.get_json(silent=True) or {}
+            paths = data.get('requests')
+            if not isinstance(paths, list) or not paths:
+                return create_response(error='requests must be a non-empty list of paths', status=400)
+            if len(paths) > app.config['MAX_BATCH_REQUESTS']:
+                return create_response(error=f"At most {app.config['MAX_BATCH_REQUESTS']} requests per batch", status=400)
+
+            authorization = request.headers.get('Authorization', '')
+            parts = []
+            for path in paths:
+                status, body = run_batch_get(path, authorization)
+                parts.append(f'{{"path":{app.json.dumps(path)},"status":{status},"body":{body}}}')
+
+            # Sub-responses are already serialized; splice them in rather than re-encoding
+            return app.response_class(
+                '{"data":{"responses":[' + ','.join(parts) + ']}}\n', mimetype='application/json'
+            )
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error running batch: {str(e)}")
+            return create_response(error='Failed to run batch', status=500)
+
+# --- CLI Commands ---
+@app.cli.command('rebuild-rollups')
+@click.option('--user-id', type=int, default=None, help='Only rebuild rollups for this user')
+def rebuild_rollups_command(user_id):
+    """Backfill expense rollup tables from existing expenses"""
+    monthly_rows, daily_rows = rebuild_rollups(user_id)
+    click.echo(f"Rebuilt {monthly_rows} monthly and {daily_rows} daily rollup rows")
+
+@app.cli.command('reconcile-budget-states')
+@click.option('--user-id', type=int, default=None, help='Only reconcile this user')
+def reconcile_budget_states_command(user_id):
+    """Verify budget states against the expenses table and repair any drift"""
+    try:
+        result = reconcile_budget_states(user_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f"Checked {result['checked']} budget states, repaired {result['mismatched']}")
+
+@app.cli.command('run-jobs')
+@click.option('--once', is_flag=True, help='Run the jobs a single time and exit')
+@click.option('--interval', type=int, default=3600, help='Seconds between runs')
+@click.option('--reconcile', is_flag=True, help='Also check budget states against raw expenses')
+def run_jobs_command(once, interval, reconcile):
+    """Roll over recurring bills, record overdue bills and create bill and budget reminders"""
+    while True:
+        try:
+            summary = run_jobs(reconcile=reconcile)
+            if summary.get('budget_states_mismatched'):
+                logger.warning(f"Repaired {summary['budget_states_mismatched']} drifted budget states")
+            logger.info(f"Scheduled jobs finished: {summary}")
+        except Exception as e:
+            logger.error(f"Scheduled jobs failed: {str(e)}")
+            if once:
+                raise
+        if once:
+            break
+        time.sleep(interval)
+
+@app.cli.command('sync-replicas')
+def sync_replicas_command():
+    """Copy a SQLite primary onto SQLite replica files, for trying replica routing locally"""
+    for bind_key in replica_router.bind_keys:
+        copy_sqlite_database(db.engines[None].url, db.engines[bind_key].url)
+        click.echo(f"Copied primary database to {bind_key}")
 
 # Add resources to API
 api.add_resource(Register, '/register')
@@ -844,12 +1612,21 @@ api.add_resource(ReadCookies, '/read-cookie')
 api.add_resource(Categories, '/categories')
 api.add_resource(Budgets, '/budgets')
 api.add_resource(Expenses, '/expenses')
+api.add_resource(ExpensesBulk, '/expenses/bulk')
+api.add_resource(ExpensesExport, '/expenses/export')
 api.add_resource(Bills, '/bills')
 api.add_resource(PayBills, '/bills/<int:bill_id>/pay')
 api.add_resource(BillsById, '/bills/<int:bill_id>')
 api.add_resource(BillPayments, '/billpayments')
+api.add_resource(BillPaymentsExport, '/billpayments/export')
 api.add_resource(Dashboards, '/dashboard')
 api.add_resource(Insights, '/insights')
+api.add_resource(Reminders, '/reminders')
+api.add_resource(EventStream, '/events')
+api.add_resource(EventStreamToken, '/events/token')
+api.add_resource(DismissReminders, '/reminders/dismiss')
+api.add_resource(DismissReminder, '/reminders/<int:reminder_id>/dismiss')
+api.add_resource(Batch, '/batch')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,26 @@
+"""ASGI entry point.
+
+Wraps the Flask app for uvicorn, the production server (both packages are
+in the Pipfile):
+
+    uvicorn asgi:asgi_app --workers 4
+
+Each request runs on its own thread from a pool of ASGI_THREADS per worker
+process, so concurrency per process is bounded by that pool rather than by
+the process count. Every open /events stream holds one of those threads for
+as long as it stays connected; size ASGI_THREADS for the expected number of
+streams plus ordinary traffic.
+
+asgiref's WsgiToAsgi is not used: it runs every request on a single shared
+thread, which serializes the whole worker.
+"""
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import app
+
+# Request threads per worker process
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+
+asgi_app = WSGIMiddleware(app, workers=ASGI_THREADS)
@@ -0,0 +1,87 @@
+"""Throughput benchmark for comparing deployment modes at high concurrency.
+
+Start the API under each server, then point this script at it:
+
+    gunicorn app:app --workers 4                      # sync workers
+    uvicorn asgi:asgi_app --workers 4                 # ASGI mode
+
+    python benchmarks/concurrency.py --url http://127.0.0.1:8000 \\
+        --email demo@example.com --password demo123 --concurrency 64 --requests 5000
+
+Reports requests/second and latency percentiles per endpoint.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import statistics
+import time
+import urllib.request
+
+DEFAULT_PATHS = ['/dashboard', '/expenses', '/bills', '/budgets', '/insights']
+
+
+def login(base_url, email, password):
+    body = json.dumps({'email': email, 'password': password}).encode('utf-8')
+    request = urllib.request.Request(
+        f'{base_url}/login', data=body, headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)['data']['access_token']
+
+
+def timed_get(url, token):
+    request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(base_url, token, path, concurrency, total):
+    url = f'{base_url}{path}'
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: timed_get(url, token), range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, ok in results if ok]
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        'path': path,
+        'requests_per_second': round(total / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--email', default='demo@example.com')
+    parser.add_argument('--password', default='demo123')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint')
+    parser.add_argument('--path', action='append', help='Endpoint to hit (repeatable)')
+    args = parser.parse_args()
+
+    token = login(args.url, args.email, args.password)
+    for path in args.path or DEFAULT_PATHS:
+        print(json.dumps(run(args.url, token, path, args.concurrency, args.requests)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Synthetic dataset generator for benchmarks.
+
+Creates N users, each with a budget per category, M expenses and K bills,
+using bulk inserts so large datasets load in seconds. Point DATABASE_URL at
+the database to fill (run `flask db upgrade` on it first):
+
+    python benchmarks/generate_data.py --users 100 --expenses 10000 --bills 50
+
+    DATABASE_URL=postgresql://localhost/budgetwise_bench \\
+        python benchmarks/generate_data.py --users 100 --expenses 10000 --bills 50
+
+Every user gets the email <prefix><n>@example.com and the same password, which
+benchmarks/workload.py uses to log in.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import argparse
+import os
+import random
+import sys
+import time
+
+import bcrypt
+from sqlalchemy import insert
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, User, Category, Budget, Bill
+from expense_import import insert_expenses, IMPORT_CHUNK_SIZE
+from versions import bump_data_versions
+
+CATEGORY_NAMES = ['Food & Dining', 'Transportation', 'Bills & Utilities', 'Entertainment', 'Shopping', 'Healthcare', 'Other']
+BILL_NAMES = ['Rent', 'Electricity', 'Water', 'Internet', 'Phone', 'Insurance', 'Gym', 'Streaming']
+RECURRING_TYPES = ['weekly', 'monthly', 'monthly', 'yearly', 'one-time']
+
+
+def ensure_categories():
+    existing = {category.name: category.id for category in Category.query.all()}
+    missing = [{'name': name} for name in CATEGORY_NAMES if name not in existing]
+    if missing:
+        db.session.execute(insert(Category), missing)
+        existing = {category.name: category.id for category in Category.query.all()}
+    return list(existing.values())
+
+
+def create_users(count, prefix, password):
+    # One hash shared by every user; bcrypt cost would otherwise dominate generation
+    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8')
+    now = datetime.utcnow()
+    rows = [{
+        'username': f'{prefix}{n}',
+        'email': f'{prefix}{n}@example.com',
+        'password_hash': password_hash,
+        'is_demo_user': False,
+        'created_at': now,
+        'updated_at': now,
+    } for n in range(count)]
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        db.session.execute(insert(User), rows[start:start + IMPORT_CHUNK_SIZE])
+    emails = [row['email'] for row in rows]
+    return [user_id for user_id, in db.session.query(User.id).filter(User.email.in_(emails))]
+
+
+def create_budgets(user_ids, category_ids, rng):
+    rows = [{
+        'user_id': user_id,
+        'category_id': category_id,
+        'budgeted_amount': Decimal(rng.randrange(100, 2000)),
+    } for user_id in user_ids for category_id in category_ids]
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        db.session.execute(insert(Budget), rows[start:start + IMPORT_CHUNK_SIZE])
+
+
+def create_expenses(user_ids, category_ids, per_user, days, rng):
+    today = date.today()
+    for user_id in user_ids:
+        insert_expenses([{
+            'user_id': user_id,
+            'category_id': rng.choice(category_ids),
+            'description': f'Expense {n}',
+            'amount': Decimal(rng.randrange(100, 20000)) / 100,
+            'expense_date': today - timedelta(days=rng.randrange(days)),
+        } for n in range(per_user)])
+
+
+def create_bills(user_ids, per_user, rng):
+    today = date.today()
+    rows = [{
+        'user_id': user_id,
+        'name': f'{rng.choice(BILL_NAMES)} {n}',
+        'amount': Decimal(rng.randrange(1000, 200000)) / 100,
+        'category': 'Bills & Utilities',
+        'due_date': today + timedelta(days=rng.randrange(-30, 60)),
+        'recurring_type': rng.choice(RECURRING_TYPES),
+    } for user_id in user_ids for n in range(per_user)]
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        db.session.execute(insert(Bill), rows[start:start + IMPORT_CHUNK_SIZE])
+    bump_data_versions(db.session.connection(), set(user_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--expenses', type=int, default=1000, help='Expenses per user')
+    parser.add_argument('--bills', type=int, default=20, help='Bills per user')
+    parser.add_argument('--days', type=int, default=365, help='Spread expense dates over this many past days')
+    parser.add_argument('--prefix', default='bench')
+    parser.add_argument('--password', default='bench123')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    with app.app_context():
+        category_ids = ensure_categories()
+        user_ids = create_users(args.users, args.prefix, args.password)
+        create_budgets(user_ids, category_ids, rng)
+        create_expenses(user_ids, category_ids, args.expenses, args.days, rng)
+        create_bills(user_ids, args.bills, rng)
+        db.session.commit()
+
+    print(
+        f'Created {len(user_ids)} users, {len(user_ids) * args.expenses} expenses and '
+        f'{len(user_ids) * args.bills} bills in {time.perf_counter() - started:.1f}s'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Serialization benchmark for /expenses with a large page of rows.
+
+Builds a throwaway SQLite database with one user and --rows expenses, then
+compares, for a single page holding every row:
+
+  * ORM objects + to_dict() against column rows + Expense.row_to_dict()
+  * the stdlib provider with indented output (the old app.json.compact = False),
+    the compact stdlib provider and the orjson provider
+
+reporting response bytes and CPU milliseconds per request (best of --repeat).
+
+    python benchmarks/json_encoding.py --rows 10000
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+DATABASE = os.path.join(tempfile.mkdtemp(), 'serialization.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DATABASE}'
+os.environ.setdefault('MAX_PAGE_SIZE', '100000')
+os.environ.setdefault('JWT_SECRET_KEY', 'benchmark')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from app import app
+from models import db, User, Category, Expense
+from expense_import import insert_expenses
+from serialization import CompactJSONProvider, OrjsonProvider, orjson
+
+
+def populate(rows):
+    db.create_all()
+    db.session.execute(insert(Category), [{'name': f'Category {n}'} for n in range(7)])
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    category_ids = [category.id for category in Category.query.all()]
+    today = date.today()
+    insert_expenses([{
+        'user_id': user.id,
+        'category_id': category_ids[n % len(category_ids)],
+        'description': f'Expense {n}',
+        'amount': Decimal(n % 5000) / 100 + 1,
+        'expense_date': today - timedelta(days=n % 365),
+    } for n in range(rows)])
+    db.session.commit()
+    return user.id
+
+
+def best_cpu(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        result = fn()
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        user_id = populate(args.rows)
+        token = create_access_token(identity='bench@example.com', additional_claims={'uid': user_id})
+
+        def orm_rows():
+            db.session.expunge_all()
+            return [expense.to_dict() for expense in Expense.query.filter_by(user_id=user_id).all()]
+
+        def column_rows():
+            return [Expense.row_to_dict(row) for row in
+                    db.session.query(*Expense.list_columns()).filter(Expense.user_id == user_id).all()]
+
+        for name, fn in (('orm to_dict', orm_rows), ('column rows', column_rows)):
+            cpu_ms, _ = best_cpu(fn, args.repeat)
+            print(json.dumps({'build': name, 'rows': args.rows, 'cpu_ms': round(cpu_ms, 1)}))
+
+    pretty = CompactJSONProvider(app)
+    pretty.compact = False
+    providers = [('stdlib indented', pretty), ('stdlib compact', CompactJSONProvider(app))]
+    if orjson is not None:
+        providers.append(('orjson', OrjsonProvider(app)))
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    for name, provider in providers:
+        app.json = provider
+
+        def request():
+            return client.get(f'/expenses?limit={args.rows}', headers=headers)
+
+        cpu_ms, response = best_cpu(request, args.repeat)
+        print(json.dumps({
+            'provider': name,
+            'status': response.status_code,
+            'bytes': len(response.get_data()),
+            'cpu_ms': round(cpu_ms, 1),
+        }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Scripted workload benchmark against a dataset from generate_data.py.
+
+Each virtual user logs in as one generated user and repeats a scenario that
+loads the dashboard and insights, filters expenses and pays a bill. Start the
+API with Server-Timing enabled so queries per request can be reported:
+
+    python benchmarks/generate_data.py --users 50 --expenses 5000 --bills 40
+    SERVER_TIMING=true gunicorn app:app --workers 4 --threads 8
+    python benchmarks/workload.py --url http://127.0.0.1:8000 --users 50 --iterations 20
+
+Run the same steps with DATABASE_URL pointing at a local Postgres database to
+compare backends. Prints one JSON line per scenario step with p50/p99 latency
+and mean queries per request.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+import urllib.request
+
+from concurrency import login, percentile
+
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def timed_request(base_url, token, method, path, body=None):
+    """Returns (seconds, ok, queries or None, parsed JSON body or None)"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(f'{base_url}{path}', data=data, method=method, headers={
+        'Authorization': f'Bearer {token}',
+        'Content-Type': 'application/json',
+    })
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            payload = response.read()
+            ok = 200 <= response.status < 300
+            timing = response.headers.get('Server-Timing', '')
+    except Exception:
+        return time.perf_counter() - started, False, None, None
+    elapsed = time.perf_counter() - started
+
+    match = QUERY_COUNT.search(timing)
+    return elapsed, ok, int(match.group(1)) if match else None, json.loads(payload)
+
+
+def unpaid_bill_ids(base_url, token):
+    ids = []
+    for status in ('upcoming', 'overdue'):
+        _, ok, _, payload = timed_request(base_url, token, 'GET', f'/bills?status={status}&limit=500')
+        if ok:
+            ids.extend(bill['id'] for bill in payload['data']['bills'])
+    return ids
+
+
+def virtual_user(base_url, email, password, iterations, seed):
+    """Run the scenario for one user; returns [(step, seconds, ok, queries)]"""
+    rng = random.Random(seed)
+    token = login(base_url, email, password)
+    _, _, _, categories = timed_request(base_url, token, 'GET', '/categories')
+    category_ids = [category['id'] for category in categories['data']['categories']]
+    bill_ids = unpaid_bill_ids(base_url, token)
+
+    samples = []
+    for _ in range(iterations):
+        start_date = (date.today() - timedelta(days=rng.randrange(30, 180))).isoformat()
+        steps = [
+            ('GET /dashboard', 'GET', '/dashboard'),
+            ('GET /insights', 'GET', '/insights'),
+            ('GET /expenses', 'GET', '/expenses?limit=50'),
+            ('GET /expenses filtered', 'GET',
+             f'/expenses?category_id={rng.choice(category_ids)}&start_date={start_date}&limit=50'),
+        ]
+        if bill_ids:
+            steps.append(('POST /bills/<id>/pay', 'POST', f'/bills/{bill_ids.pop()}/pay'))
+
+        for step, method, path in steps:
+            elapsed, ok, queries, _ = timed_request(
+                base_url, token, method, path, body={} if method == 'POST' else None
+            )
+            samples.append((step, elapsed, ok, queries))
+    return samples
+
+
+def summarize(samples):
+    by_step = defaultdict(list)
+    for step, elapsed, ok, queries in samples:
+        by_step[step].append((elapsed, ok, queries))
+
+    for step, results in by_step.items():
+        latencies = [elapsed for elapsed, ok, _ in results if ok]
+        queries = [count for _, ok, count in results if ok and count is not None]
+        yield {
+            'step': step,
+            'requests': len(results),
+            'errors': sum(1 for _, ok, _ in results if not ok),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'queries_per_request': round(statistics.mean(queries), 1) if queries else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--iterations', type=int, default=10, help='Scenario repetitions per user')
+    parser.add_argument('--prefix', default='bench')
+    parser.add_argument('--password', default='bench123')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        runs = pool.map(
+            lambda n: virtual_user(args.url, f'{args.prefix}{n}@example.com', args.password, args.iterations, n),
+            range(args.users)
+        )
+        samples = [sample for run in runs for sample in run]
+    elapsed = time.perf_counter() - started
+
+    for summary in summarize(samples):
+        print(json.dumps(summary))
+    print(json.dumps({'total_requests': len(samples), 'requests_per_second': round(len(samples) / elapsed, 1)}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+import json
+import threading
+import time
+
+from flask import has_request_context, request
+
+
+def request_memo(key, build):
+    """Return build() computed at most once per request.
+
+    The memo lives on the request rather than g: /batch sub-requests share one
+    app context, and a value memoized by one of them (budgets, the data version)
+    must not leak into the next. Outside a request, build() runs every time.
+    Only use it for values that no write in the same request can change.
+    """
+    if not has_request_context():
+        return build()
+    memo = request.environ.setdefault('budgetwise.request_memo', {})
+    if key not in memo:
+        memo[key] = build()
+    return memo[key]
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional per-entry TTL (seconds).
+
+    A maxsize of 0 disables the cache: get() always misses and set() is a no-op.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        if not self.maxsize:
+            return default
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if not self.maxsize:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Cache backend for a Redis-compatible server (requires the optional `redis` package)"""
+
+    def __init__(self, url, ttl=None):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        raw = self.client.get(key)
+        if raw is None:
+            return default
+        return json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(key, json.dumps(value, default=str), ex=self.ttl or None)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class ResponseCache:
+    """Per-user cache of response payloads, keyed on the user's data version.
+
+    versions.bump_data_versions increments that version in the same transaction
+    as every write, whether it comes from a request handler, the job worker or
+    a bulk import, so a changed user never reads an old entry and nothing has
+    to be invalidated explicitly. Old entries age out of the backend.
+
+    Payloads are stored as JSON text, so callers always get their own copy and
+    can modify it without corrupting the cached entry.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_or_build(self, namespace, user_id, version, build, variant=''):
+        """Return the cached payload, calling build() and caching its result on a miss"""
+        key = f'{namespace}:{user_id}:{version}:{variant}'
+        cached = self.backend.get(key)
+        if cached is not None:
+            return json.loads(cached)
+        value = build()
+        self.backend.set(key, json.dumps(value, default=str))
+        return value
+
+
+def create_response_cache(config):
+    """Build the ResponseCache described by RESPONSE_CACHE_* settings"""
+    backend_name = config['RESPONSE_CACHE_BACKEND']
+    ttl = config['RESPONSE_CACHE_TTL']
+    if backend_name == 'memory':
+        backend = LRUCache(config['RESPONSE_CACHE_SIZE'], ttl)
+    elif backend_name == 'redis':
+        backend = RedisCache(config['RESPONSE_CACHE_URL'], ttl)
+    else:
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend_name}")
+    return ResponseCache(backend)
@@ -0,0 +1,132 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional; only gzip is offered without it
+    brotli = None
+
+# Content types worth compressing; everything else is passed through untouched
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/event-stream',
+    'text/plain',
+    'text/html',
+}
+
+# Streamed content types, and how many uncompressed bytes may wait in the
+# compressor before a flush. Events go out one by one; exports are flushed every
+# few KB, so clients see rows as they are produced without a flush per row.
+STREAM_FLUSH_BYTES = {
+    'text/event-stream': 0,
+    'text/csv': 8 * 1024,
+    'application/x-ndjson': 8 * 1024,
+}
+
+
+def encoded_etag(etag, encoding):
+    """Strong ETag for the encoded variant of a representation"""
+    return f'{etag}-{encoding}'
+
+
+class GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+
+    def compress(self, data, flush=False):
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data, flush=False):
+        output = self._compressor.process(data)
+        if flush:
+            output += self._compressor.flush()
+        return output
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ResponseCompressor:
+    """Compresses responses in an after_request hook, negotiating br or gzip.
+
+    Buffered responses below min_size are sent as-is. Streamed responses (exports,
+    /events) are compressed chunk by chunk as they are produced and flushed per
+    STREAM_FLUSH_BYTES: every event immediately, exports every few KB.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_level=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def _stream(self, encoding):
+        if encoding == 'br':
+            return BrotliStream(self.brotli_level)
+        return GzipStream(self.gzip_level)
+
+    def choose_encoding(self, request):
+        return request.accept_encodings.best_match(self.encodings)
+
+    def compress(self, request, response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose_encoding(request)
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_chunks(
+                response.response, self._stream(encoding),
+                flush_bytes=STREAM_FLUSH_BYTES.get(response.mimetype)
+            )
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            stream = self._stream(encoding)
+            response.set_data(stream.compress(data) + stream.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        # Each encoding is different bytes, so it gets its own strong validator
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+        return response
+
+    @staticmethod
+    def _compress_chunks(chunks, stream, flush_bytes):
+        pending = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                pending += len(chunk)
+                flush = flush_bytes is not None and pending >= flush_bytes
+                if flush:
+                    pending = 0
+                output = stream.compress(chunk, flush=flush)
+                if output:
+                    yield output
+            yield stream.finish()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
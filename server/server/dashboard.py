@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import raiseload
+
+from models import db, Bill, Expense, ExpenseRollup
+from rollups import load_user_budgets, year_month
+from caching import request_memo
+
+# Statements issued by build_dashboard, independent of how many rows a user has:
+#   1. scalar summary (month total, overdue count/amount, upcoming count)
+#   2. budgets joined to their spent totals
+#   3. the ten most recent expenses
+#   4. unpaid bills that are overdue or due within UPCOMING_BILLS_DAYS
+DASHBOARD_QUERY_COUNT = 4
+
+RECENT_EXPENSES_LIMIT = 10
+RECENT_EXPENSES_DAYS = 30
+UPCOMING_BILLS_DAYS = 7
+
+
+def get_dashboard_summary(user_id, today):
+    """Fetch every scalar the dashboard summary needs in one round trip"""
+    overdue = Bill.status_filter('overdue', today)
+    upcoming = Bill.status_filter('upcoming', today)
+    upcoming_end = today + timedelta(days=UPCOMING_BILLS_DAYS)
+
+    stmt = select(
+        select(func.coalesce(func.sum(ExpenseRollup.total_amount), 0)).where(
+            ExpenseRollup.user_id == user_id,
+            ExpenseRollup.year_month == year_month(today)
+        ).scalar_subquery().label('month_total'),
+        select(func.count(Bill.id)).where(
+            Bill.user_id == user_id, overdue
+        ).scalar_subquery().label('overdue_count'),
+        select(func.coalesce(func.sum(Bill.amount), 0)).where(
+            Bill.user_id == user_id, overdue
+        ).scalar_subquery().label('overdue_amount'),
+        select(func.count(Bill.id)).where(
+            Bill.user_id == user_id, upcoming, Bill.due_date <= upcoming_end
+        ).scalar_subquery().label('upcoming_count'),
+    )
+    return db.session.execute(stmt).one()
+
+
+def build_dashboard(user, today=None):
+    """Assemble the /dashboard payload in DASHBOARD_QUERY_COUNT statements"""
+    today = today or date.today()
+
+    summary = get_dashboard_summary(user.id, today)
+
+    budgets = request_memo(('budgets', user.id), lambda: load_user_budgets(user.id))
+
+    recent_expenses = Expense.query.filter(
+        Expense.user_id == user.id,
+        Expense.expense_date >= today - timedelta(days=RECENT_EXPENSES_DAYS)
+    ).options(raiseload(Expense.category)).order_by(
+        Expense.expense_date.desc(), Expense.id.desc()
+    ).limit(RECENT_EXPENSES_LIMIT).all()
+
+    # Overdue and upcoming bills come back together and are split here
+    pending_bills = Bill.query.filter(
+        Bill.user_id == user.id,
+        Bill.paid_date.is_(None),
+        Bill.due_date <= today + timedelta(days=UPCOMING_BILLS_DAYS)
+    ).order_by(Bill.due_date.asc(), Bill.id.asc()).all()
+    overdue_bills = [bill for bill in pending_bills if bill.due_date < today]
+    upcoming_bills = [bill for bill in pending_bills if bill.due_date >= today]
+
+    total_budgeted = sum(float(budget.budgeted_amount) for budget in budgets)
+    total_spent_budgets = sum(float(budget.spent_amount) for budget in budgets)
+
+    return {
+        'user': user.to_dict(),
+        'summary': {
+            'total_budgeted': total_budgeted,
+            'total_spent_budgets': total_spent_budgets,
+            'budget_utilization': (total_spent_budgets / total_budgeted * 100) if total_budgeted > 0 else 0,
+            'month_expenses_total': float(summary.month_total),
+            'overdue_bills_count': summary.overdue_count,
+            'overdue_bills_amount': float(summary.overdue_amount),
+            'upcoming_bills_count': summary.upcoming_count,
+        },
+        'budgets': [budget.to_dict() for budget in budgets],
+        'recent_expenses': [expense.to_dict() for expense in recent_expenses],
+        'overdue_bills': [bill.to_dict() for bill in overdue_bills],
+        'upcoming_bills': [bill.to_dict() for bill in upcoming_bills],
+    }
@@ -0,0 +1,113 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def engine_options(database_uri, config):
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URI from the DB_* settings"""
+    url = make_url(database_uri)
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+
+    if url.get_backend_name() == 'sqlite':
+        # File databases get a QueuePool; in-memory ones use a per-thread pool
+        # that takes none of the sizing arguments
+        if url.database and url.database != ':memory:':
+            options['pool_size'] = config['DB_POOL_SIZE']
+            options['max_overflow'] = config['DB_MAX_OVERFLOW']
+            options['pool_timeout'] = config['DB_POOL_TIMEOUT']
+        return options
+
+    options.update({
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    })
+    if config['DB_STATEMENT_TIMEOUT'] and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}"}
+    return options
+
+
+def parse_pragmas(value):
+    """Turn 'journal_mode=WAL,synchronous=NORMAL' into [(name, value), ...]"""
+    pragmas = []
+    for item in value.split(','):
+        name, _, setting = item.strip().partition('=')
+        if name and setting:
+            pragmas.append((name.strip(), setting.strip()))
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run PRAGMA statements on every new SQLite connection"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, setting in pragmas:
+                cursor.execute(f'PRAGMA {name}={setting}')
+        finally:
+            cursor.close()
+
+
+class PoolMetrics:
+    """Counts connection pool events for one engine and reports current usage"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._counts = {'connects': 0, 'checkouts': 0, 'invalidations': 0, 'max_checked_out': 0}
+        self._checked_out = 0
+
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._counts['connects'] += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self._counts['checkouts'] += 1
+            self._checked_out += 1
+            self._counts['max_checked_out'] = max(self._counts['max_checked_out'], self._checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._checked_out = max(self._checked_out - 1, 0)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self._counts['invalidations'] += 1
+
+    def stats(self):
+        pool = self.engine.pool
+        with self._lock:
+            stats = dict(self._counts)
+            stats['checked_out'] = self._checked_out
+        stats['pool'] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'pool_size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+                'max_overflow': pool._max_overflow,
+            })
+        return stats
+
+
+def configure_engines(engines, config):
+    """Apply SQLite pragmas and attach PoolMetrics; returns {bind key: PoolMetrics}"""
+    pragmas = parse_pragmas(config['SQLITE_PRAGMAS'])
+    metrics = {}
+    for key, engine in engines.items():
+        apply_sqlite_pragmas(engine, pragmas)
+        metrics[key or 'default'] = PoolMetrics(engine)
+    return metrics
@@ -0,0 +1,127 @@
+from collections import defaultdict
+import json
+import queue
+import threading
+
+# Messages buffered per subscriber before new ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class LocalSubscription:
+    def __init__(self, pubsub, channel):
+        self.pubsub = pubsub
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.pubsub.unsubscribe(self)
+
+
+class LocalPubSub:
+    """In-process pub/sub; only delivers messages published by the same process"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = LocalSubscription(self, channel)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                # A stalled client loses deltas rather than blocking the writer
+                pass
+
+
+class RedisSubscription:
+    def __init__(self, client, channel):
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(channel)
+
+    def get(self, timeout):
+        message = self.pubsub.get_message(timeout=timeout)
+        if message is None:
+            return None
+        return message['data'].decode('utf-8')
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisPubSub:
+    """Pub/sub over a Redis-compatible server, shared by every worker process"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("EVENTS_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+
+    def subscribe(self, channel):
+        return RedisSubscription(self.client, channel)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+
+class EventBroker:
+    """Fans out per-user dashboard deltas to server-sent event streams"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def publish(self, user_id, event_type, data):
+        message = json.dumps({'type': event_type, 'data': data}, default=str)
+        self.backend.publish(f'events:{user_id}', message)
+
+    def stream(self, user_id, heartbeat=15):
+        """Yield SSE frames for a user until the client disconnects"""
+        subscription = self.backend.subscribe(f'events:{user_id}')
+        try:
+            # Sent straight away so the client knows the stream is live
+            yield 'retry: 5000\n\n'
+            while True:
+                message = subscription.get(timeout=heartbeat)
+                if message is None:
+                    yield ': keepalive\n\n'
+                    continue
+                event_type = json.loads(message)['type']
+                yield f'event: {event_type}\ndata: {message}\n\n'
+        finally:
+            subscription.close()
+
+
+def create_event_broker(config):
+    """Build the EventBroker described by EVENTS_* settings"""
+    backend_name = config['EVENTS_BACKEND']
+    if backend_name == 'memory':
+        backend = LocalPubSub()
+    elif backend_name == 'redis':
+        backend = RedisPubSub(config['EVENTS_URL'])
+    else:
+        raise ValueError(f"Unknown EVENTS_BACKEND: {backend_name}")
+    return EventBroker(backend)
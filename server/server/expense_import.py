@@ -0,0 +1,126 @@
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert
+
+from models import db, Category, Expense
+from rollups import RollupDelta, apply_rollup_delta
+from versions import bump_data_versions
+
+# Rows sent per executemany batch
+IMPORT_CHUNK_SIZE = 1000
+
+MAX_AMOUNT = Decimal('99999999.99')  # Numeric(10, 2)
+MAX_DESCRIPTION_LENGTH = 255
+
+
+def read_csv_rows(data):
+    """Parse UTF-8 CSV bytes with a header row into a list of dicts.
+
+    A leading byte order mark is dropped; other encodings raise UnicodeDecodeError.
+    """
+    return list(csv.DictReader(io.StringIO(data.decode('utf-8-sig'))))
+
+
+def validate_expense_rows(rows, user_id):
+    """Validate raw rows in one pass; returns (valid expense dicts, per-row errors).
+
+    Each row needs description, amount, expense_date and either category_id or a
+    category name. Row numbers in errors are 1-based positions in the input.
+    """
+    categories = Category.query.with_entities(Category.id, Category.name).all()
+    category_ids = {category_id for category_id, _ in categories}
+    category_names = {name.lower(): category_id for category_id, name in categories}
+
+    valid, errors = [], []
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': index, 'error': 'Row must be an object'})
+            continue
+
+        category_id = row.get('category_id')
+        category_name = str(row.get('category') or '').strip()
+        description = str(row.get('description') or '').strip()
+        amount = str(row.get('amount') or '').strip()
+        expense_date = str(row.get('expense_date') or '').strip()
+
+        if isinstance(category_id, bool):
+            # bool is an int subclass, so int(True) would quietly pick category 1
+            errors.append({'row': index, 'error': 'Invalid category_id'})
+            continue
+        if category_id not in (None, ''):
+            try:
+                category_id = int(category_id)
+            except (ValueError, TypeError):
+                errors.append({'row': index, 'error': 'Invalid category_id'})
+                continue
+            if category_id not in category_ids:
+                errors.append({'row': index, 'error': 'Category not found'})
+                continue
+        elif category_name:
+            category_id = category_names.get(category_name.lower())
+            if category_id is None:
+                errors.append({'row': index, 'error': f'Category not found: {category_name}'})
+                continue
+        else:
+            errors.append({'row': index, 'error': 'category_id is required'})
+            continue
+
+        if not description:
+            errors.append({'row': index, 'error': 'description is required'})
+            continue
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            errors.append({'row': index, 'error': f'description must be at most {MAX_DESCRIPTION_LENGTH} characters'})
+            continue
+
+        try:
+            amount = Decimal(amount)
+        except InvalidOperation:
+            errors.append({'row': index, 'error': 'Invalid amount format'})
+            continue
+        if not amount.is_finite():
+            errors.append({'row': index, 'error': 'Invalid amount format'})
+            continue
+        if amount <= 0:
+            errors.append({'row': index, 'error': 'Amount must be positive'})
+            continue
+        if amount > MAX_AMOUNT:
+            errors.append({'row': index, 'error': f'Amount too large (maximum {MAX_AMOUNT})'})
+            continue
+
+        try:
+            expense_date = datetime.strptime(expense_date, '%Y-%m-%d').date()
+        except ValueError:
+            errors.append({'row': index, 'error': 'Invalid date format. Use YYYY-MM-DD'})
+            continue
+
+        valid.append({
+            'user_id': user_id,
+            'category_id': category_id,
+            'description': description,
+            'amount': amount.quantize(Decimal('0.01')),
+            'expense_date': expense_date,
+        })
+
+    return valid, errors
+
+
+def insert_expenses(rows):
+    """Insert validated rows in executemany batches and keep rollups/versions in step.
+
+    Bulk inserts bypass the ORM flush events, so the rollup and data-version
+    maintenance normally done by the after_flush listeners is applied here, in
+    the same transaction. The caller commits.
+    """
+    connection = db.session.connection()
+    delta = RollupDelta()
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+        db.session.execute(insert(Expense), chunk)
+        for row in chunk:
+            delta.add(row['user_id'], row['category_id'], row['expense_date'], row['amount'])
+
+    apply_rollup_delta(connection, delta)
+    bump_data_versions(connection, {row['user_id'] for row in rows})
+    return len(rows)
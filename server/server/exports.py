@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# Last line of an export that failed after its headers were sent
+EXPORT_ERROR_MESSAGE = 'export failed; the rows above are incomplete'
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def stream_rows(result, columns, export_format):
+    """Yield a streamed export of a SQL result, ending it with an error marker if it fails.
+
+    The status line is long gone by the time a row fails, so the error is logged,
+    a marker line is written, and the exception is re-raised to abort the
+    connection instead of finishing what looks like a complete 200.
+    """
+    try:
+        yield from _stream_rows(result, columns, export_format)
+    except Exception as e:
+        logger.error(f"Export failed mid-stream: {str(e)}")
+        if export_format == 'csv':
+            yield f'#ERROR: {EXPORT_ERROR_MESSAGE}\r\n'
+        else:
+            yield json.dumps({'error': EXPORT_ERROR_MESSAGE}) + '\n'
+        raise
+
+
+def _stream_rows(result, columns, export_format):
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return chunk
+
+        writer.writerow(columns)
+        yield flush()
+        for row in result:
+            writer.writerow(row)
+            yield flush()
+    else:
+        for row in result:
+            yield json.dumps({column: _json_value(value) for column, value in zip(columns, row)}) + '\n'
+
+
+def export_filename(name, export_format):
+    return f"{name}-{date.today().isoformat()}.{export_format}"
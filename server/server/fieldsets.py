@@ -0,0 +1,104 @@
+from operator import attrgetter
+
+from flask import request
+
+from models import Bill, Budget, Category, Expense
+
+
+def column(name, convert=None):
+    """Field read from a single column, optionally converted when not null"""
+    if convert is None:
+        return (name,), attrgetter(name)
+
+    def get(obj):
+        value = getattr(obj, name)
+        return convert(value) if value is not None else None
+    return (name,), get
+
+
+def computed(getter, *columns):
+    """Field derived from other columns; only computed when requested"""
+    return columns, getter
+
+
+def isoformat(value):
+    return value.isoformat()
+
+
+class FieldSet:
+    """Fields a list endpoint can return with ?fields=, and the columns each one reads.
+
+    Endpoints select only the columns of the requested fields (column selects or
+    load_only) and produce only the requested computed values.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+    def parse(self):
+        """Requested field names from ?fields= (None means all); returns (names, error)"""
+        value = request.args.get('fields')
+        if not value:
+            return None, None
+        names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            return None, f"Unknown fields: {', '.join(unknown) or value}. Available: {', '.join(self.fields)}"
+        return names, None
+
+    def columns(self, names, always=()):
+        """Model columns needed to produce the given fields, plus any always needed"""
+        needed = dict.fromkeys(always)
+        for name in names:
+            needed.update(dict.fromkeys(self.fields[name][0]))
+        return [getattr(self.model, name) for name in needed]
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name][1](obj) for name in names}
+
+
+# Keys match Expense.to_dict(); getters work on ORM objects and column Rows alike
+EXPENSE_FIELDS = FieldSet(Expense, {
+    'id': column('id'),
+    'user_id': column('user_id'),
+    'category_id': column('category_id', Category.get_cached),
+    'description': column('description'),
+    'amount': column('amount', float),
+    'expense_date': column('expense_date', isoformat),
+    'created_at': column('created_at', isoformat),
+    'updated_at': column('updated_at', isoformat),
+})
+
+BILL_FIELDS = FieldSet(Bill, {
+    'id': column('id'),
+    'user_id': column('user_id'),
+    'name': column('name'),
+    'amount': column('amount', float),
+    'category': column('category'),
+    'due_date': column('due_date', isoformat),
+    'recurring_type': column('recurring_type'),
+    'paid_date': column('paid_date', isoformat),
+    'overdue_since': column('overdue_since', isoformat),
+    'status': computed(attrgetter('status'), 'paid_date', 'due_date'),
+    'is_overdue': computed(attrgetter('is_overdue'), 'paid_date', 'due_date'),
+    'days_until_due': computed(attrgetter('days_until_due'), 'due_date'),
+    'created_at': column('created_at', isoformat),
+    'updated_at': column('updated_at', isoformat),
+})
+
+BUDGET_FIELDS = FieldSet(Budget, {
+    'id': column('id'),
+    'user_id': column('user_id'),
+    'category': computed(lambda budget: Category.get_cached(budget.category_id), 'category_id'),
+    'budgeted_amount': column('budgeted_amount', float),
+    'spent_amount': computed(lambda budget: float(budget.spent_amount), 'category_id'),
+    'variance': computed(lambda budget: round(budget.variance, 2), 'category_id', 'budgeted_amount'),
+    'percentage_used': computed(lambda budget: round(budget.percentage_used, 2), 'category_id', 'budgeted_amount'),
+    'is_over_budget': computed(attrgetter('is_over_budget'), 'category_id', 'budgeted_amount'),
+    'created_at': column('created_at', isoformat),
+    'updated_at': column('updated_at', isoformat),
+})
+
+# Budget fields that need spent totals from the rollup tables
+BUDGET_SPENT_FIELDS = {'spent_amount', 'variance', 'percentage_used', 'is_over_budget'}
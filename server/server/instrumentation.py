@@ -0,0 +1,113 @@
+from collections import defaultdict
+import threading
+import time
+
+from flask import g, has_app_context
+from sqlalchemy import event
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = 'budgetwise'
+
+
+def instrument_engine(engine):
+    """Count statements and time spent in the database for the current app context"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(connection, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context, so a statement that fails leaves nothing behind
+        if context is not None:
+            context._budgetwise_query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(connection, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_budgetwise_query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if has_app_context():
+            g.sql_queries = g.get('sql_queries', 0) + 1
+            g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+
+
+class RequestMetrics:
+    """Per-endpoint latency histograms, request counts and SQL usage for this process"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._latency = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self._latency_sum = defaultdict(float)
+        self._requests = defaultdict(int)
+        self._queries = defaultdict(int)
+        self._db_seconds = defaultdict(float)
+
+    def observe(self, method, endpoint, status, seconds, queries, db_seconds):
+        key = (method, endpoint)
+        bucket = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with self._lock:
+            self._latency[key][bucket] += 1
+            self._latency_sum[key] += seconds
+            self._requests[(method, endpoint, str(status))] += 1
+            self._queries[key] += queries
+            self._db_seconds[key] += db_seconds
+
+    def render(self):
+        """Metric lines in the Prometheus text exposition format"""
+        with self._lock:
+            latency = {key: list(counts) for key, counts in self._latency.items()}
+            latency_sum = dict(self._latency_sum)
+            requests = dict(self._requests)
+            queries = dict(self._queries)
+            db_seconds = dict(self._db_seconds)
+
+        name = f'{METRIC_PREFIX}_request_duration_seconds'
+        lines = [f'# HELP {name} Request latency by endpoint', f'# TYPE {name} histogram']
+        for (method, endpoint), counts in sorted(latency.items()):
+            labels = f'method="{method}",endpoint="{escape_label(endpoint)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {latency_sum[(method, endpoint)]}')
+            lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+        name = f'{METRIC_PREFIX}_requests_total'
+        lines += [f'# HELP {name} Requests by endpoint and status', f'# TYPE {name} counter']
+        for (method, endpoint, status), count in sorted(requests.items()):
+            lines.append(f'{name}{{method="{method}",endpoint="{escape_label(endpoint)}",status="{status}"}} {count}')
+
+        for name, help_text, values in (
+            (f'{METRIC_PREFIX}_sql_queries_total', 'SQL statements executed by endpoint', queries),
+            (f'{METRIC_PREFIX}_sql_duration_seconds_total', 'Time spent in SQL statements by endpoint', db_seconds),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (method, endpoint), value in sorted(values.items()):
+                lines.append(f'{name}{{method="{method}",endpoint="{escape_label(endpoint)}"}} {value}')
+
+        return lines
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def gauge_lines(name, help_text, samples, kind='gauge'):
+    """Prometheus lines for a gauge (or counter) given {label string: value}"""
+    name = f'{METRIC_PREFIX}_{name}'
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for labels, value in samples.items():
+        lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+    return lines
+
+
+def server_timing(total_seconds, queries, db_seconds):
+    """Server-Timing header value for a request"""
+    return (
+        f'app;dur={total_seconds * 1000:.1f}, '
+        f'db;dur={db_seconds * 1000:.1f};desc="{queries} queries"'
+    )
@@ -0,0 +1,242 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import String, and_, case, cast, exists, func, insert, literal, select, update
+
+from models import db, Bill, Budget, BudgetState, Category, Expense, Reminder
+from versions import bump_data_versions
+
+# Days before the due date at which a bill_due reminder is created
+BILL_REMINDER_DAYS = 3
+
+# Percentage of a budget at which a budget_alert is raised
+BUDGET_ALERT_PERCENT = 80
+
+# Rows sent per executemany batch when rolling bills over
+ROLLOVER_CHUNK_SIZE = 1000
+
+
+def mark_overdue_bills(today=None):
+    """Record overdue_since on unpaid past-due bills and clear it where no longer true"""
+    today = today or date.today()
+    connection = db.session.connection()
+
+    newly_overdue = and_(
+        Bill.paid_date.is_(None),
+        Bill.due_date < today,
+        Bill.overdue_since.is_(None)
+    )
+    resolved = and_(
+        Bill.overdue_since.isnot(None),
+        (Bill.paid_date.isnot(None)) | (Bill.due_date >= today)
+    )
+
+    user_ids = set(connection.execute(
+        select(Bill.user_id).where(newly_overdue | resolved).distinct()
+    ).scalars())
+
+    marked = connection.execute(
+        update(Bill).where(newly_overdue).values(overdue_since=Bill.due_date)
+    ).rowcount
+    cleared = connection.execute(
+        update(Bill).where(resolved).values(overdue_since=None)
+    ).rowcount
+
+    bump_data_versions(connection, user_ids)
+    return marked, cleared
+
+
+def advance_recurring_bills(today=None):
+    """Create the next bill for paid recurring bills whose payment never rolled them over.
+
+    PayBills creates the successor and sets rolled_over itself, so this only
+    picks up bills marked paid some other way. Deleting or renaming a successor
+    does not bring it back.
+    """
+    pending = Bill.query.filter(
+        Bill.paid_date.isnot(None),
+        Bill.recurring_type != 'one-time',
+        Bill.rolled_over.is_(False)
+    ).all()
+
+    # Due-date arithmetic stays in Python (create_next_recurring_bill) so month
+    # lengths are handled the same way as when a user pays a bill
+    rows = []
+    for bill in pending:
+        next_bill = bill.create_next_recurring_bill()
+        if next_bill:
+            rows.append({
+                'user_id': next_bill.user_id,
+                'name': next_bill.name,
+                'amount': next_bill.amount,
+                'category': next_bill.category,
+                'due_date': next_bill.due_date,
+                'recurring_type': next_bill.recurring_type,
+            })
+
+    for start in range(0, len(rows), ROLLOVER_CHUNK_SIZE):
+        db.session.execute(insert(Bill), rows[start:start + ROLLOVER_CHUNK_SIZE])
+
+    pending_ids = [bill.id for bill in pending]
+    for start in range(0, len(pending_ids), ROLLOVER_CHUNK_SIZE):
+        db.session.execute(
+            update(Bill).where(Bill.id.in_(pending_ids[start:start + ROLLOVER_CHUNK_SIZE])).values(rolled_over=True)
+        )
+
+    bump_data_versions(db.session.connection(), {row['user_id'] for row in rows})
+    return len(rows)
+
+
+def create_bill_reminders(today=None):
+    """Insert one bill_due reminder per unpaid bill due soon or overdue, in a single statement"""
+    today = today or date.today()
+    connection = db.session.connection()
+
+    already_reminded = exists().where(
+        Reminder.bill_id == Bill.id,
+        Reminder.reminder_type == 'bill_due'
+    )
+    due_soon = and_(
+        Bill.paid_date.is_(None),
+        Bill.due_date <= today + timedelta(days=BILL_REMINDER_DAYS),
+        ~already_reminded
+    )
+
+    user_ids = set(connection.execute(
+        select(Bill.user_id).where(due_soon).distinct()
+    ).scalars())
+
+    message = literal('Bill Due: ') + Bill.name + literal(' is due on ') + cast(Bill.due_date, String)
+    created = connection.execute(
+        insert(Reminder).from_select(
+            ['user_id', 'bill_id', 'message', 'reminder_type', 'is_active', 'created_at'],
+            select(
+                Bill.user_id, Bill.id, message, literal('bill_due'), literal(True), literal(datetime.utcnow())
+            ).where(due_soon)
+        )
+    ).rowcount
+
+    bump_data_versions(connection, user_ids)
+    return created
+
+
+def create_budget_alerts(today=None):
+    """Insert budget_alert reminders for every budget past its threshold, in a single statement"""
+    today = today or date.today()
+    period_start = datetime.combine(today.replace(day=1), datetime.min.time())
+    connection = db.session.connection()
+
+    spent = select(
+        BudgetState.user_id,
+        BudgetState.category_id,
+        BudgetState.spent_amount
+    ).subquery()
+
+    message = literal('Budget Alert: ') + case(
+        (spent.c.spent_amount > Budget.budgeted_amount, literal('You have exceeded your ')),
+        else_=literal(f'You have used {BUDGET_ALERT_PERCENT}% of your ')
+    ) + Category.name + literal(' budget')
+
+    candidates = select(
+        Budget.user_id.label('user_id'),
+        message.label('message')
+    ).join(
+        spent, and_(spent.c.user_id == Budget.user_id, spent.c.category_id == Budget.category_id)
+    ).join(
+        Category, Category.id == Budget.category_id
+    ).where(
+        spent.c.spent_amount * 100 >= Budget.budgeted_amount * BUDGET_ALERT_PERCENT
+    ).subquery()
+
+    # An alert is raised once per budget month: not while the same alert is still
+    # active, and not again this month once dismissed
+    already_alerted = exists().where(
+        Reminder.user_id == candidates.c.user_id,
+        Reminder.reminder_type == 'budget_alert',
+        Reminder.message == candidates.c.message,
+        Reminder.is_active.is_(True) | (Reminder.created_at >= period_start)
+    )
+
+    user_ids = set(connection.execute(
+        select(candidates.c.user_id).where(~already_alerted).distinct()
+    ).scalars())
+
+    created = connection.execute(
+        insert(Reminder).from_select(
+            ['user_id', 'message', 'reminder_type', 'is_active', 'created_at'],
+            select(
+                candidates.c.user_id, candidates.c.message, literal('budget_alert'),
+                literal(True), literal(datetime.utcnow())
+            ).where(~already_alerted)
+        )
+    ).rowcount
+
+    bump_data_versions(connection, user_ids)
+    return created
+
+
+def reconcile_budget_states(user_id=None):
+    """Compare budget_states with totals recomputed from expenses and repair any drift.
+
+    Returns {'checked': n, 'mismatched': n}. Any mismatch points at a write path
+    that bypassed the rollup maintenance. The caller commits.
+    """
+    actual_query = db.session.query(
+        Expense.user_id, Expense.category_id, func.sum(Expense.amount), func.count(Expense.id)
+    )
+    stored_query = db.session.query(
+        BudgetState.user_id, BudgetState.category_id, BudgetState.spent_amount, BudgetState.expense_count
+    )
+    if user_id is not None:
+        actual_query = actual_query.filter(Expense.user_id == user_id)
+        stored_query = stored_query.filter(BudgetState.user_id == user_id)
+
+    actual = {
+        (row_user_id, category_id): (amount, count)
+        for row_user_id, category_id, amount, count in actual_query.group_by(Expense.user_id, Expense.category_id)
+    }
+    stored = {
+        (row_user_id, category_id): (amount, count)
+        for row_user_id, category_id, amount, count in stored_query
+    }
+
+    table = BudgetState.__table__
+    mismatched = []
+    for key in actual.keys() | stored.keys():
+        if actual.get(key) != stored.get(key):
+            mismatched.append(key)
+            db.session.execute(table.delete().where(
+                table.c.user_id == key[0], table.c.category_id == key[1]
+            ))
+            if key in actual:
+                amount, count = actual[key]
+                db.session.execute(table.insert().values(
+                    user_id=key[0], category_id=key[1], spent_amount=amount, expense_count=count
+                ))
+
+    bump_data_versions(db.session.connection(), {key[0] for key in mismatched})
+    return {'checked': len(actual.keys() | stored.keys()), 'mismatched': len(mismatched)}
+
+
+def run_jobs(today=None, reconcile=False):
+    """Run every scheduled job once in a single transaction; returns a summary"""
+    today = today or date.today()
+    try:
+        rolled_over = advance_recurring_bills(today)
+        marked, cleared = mark_overdue_bills(today)
+        reminders = create_bill_reminders(today)
+        budget_alerts = create_budget_alerts(today)
+        reconciled = reconcile_budget_states() if reconcile else None
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    summary = {
+        'bills_rolled_over': rolled_over,
+        'bills_marked_overdue': marked,
+        'overdue_cleared': cleared,
+        'reminders_created': reminders,
+        'budget_alerts_created': budget_alerts,
+    }
+    if reconciled is not None:
+        summary['budget_states_mismatched'] = reconciled['mismatched']
+    return summary
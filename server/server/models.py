@@ -1,18 +1,32 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData, func
+from sqlalchemy import MetaData, func, and_
 from datetime import datetime, date
 from sqlalchemy.orm import validates
-from sqlalchemy import UniqueConstraint, Index
+from sqlalchemy import UniqueConstraint, Index, false
+from sqlalchemy.ext.hybrid import hybrid_property
 
+import os
 import re
+import threading
+import time
+
+from replicas import RoutingSession
 
 # Define naming convention
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 
-# Initialize db with metadata
-db = SQLAlchemy(metadata=metadata)
+# Initialize db with metadata; the routing session lets read-only requests use replicas
+db = SQLAlchemy(metadata=metadata, session_options={'class_': RoutingSession})
+
+# Process-wide cache of serialized categories keyed by id (see Category.get_cached).
+# Entries expire after CATEGORY_CACHE_TTL seconds so workers that did not handle a
+# category write still pick it up; 0 reloads on every call.
+CATEGORY_CACHE_TTL = int(os.environ.get('CATEGORY_CACHE_TTL', 30))
+_category_cache = {}
+_category_cache_expires = [0.0]
+_category_cache_lock = threading.Lock()
 
 class User(db.Model): 
 
@@ -71,7 +85,8 @@ class Budget(db.Model):
     )
 
     def __repr__(self):
-        return f'<Budget {self.category.name if self.category else "Unknown"}: ${self.budgeted_amount}>'
+        #Only column values, so repr never triggers a load (relationships raise under raiseload)
+        return f'<Budget {self.user_id}/{self.category_id}: ${self.budgeted_amount}>'
     
     @validates('category_id')
     def validate_category(self, key, value):
@@ -90,17 +105,15 @@ class Budget(db.Model):
 
     @property
     def spent_amount(self):
-        #Calculate total spent amount for this budget's category
-        if not self.category:
-            return 0
-        
-        # Sum all expenses for this user and category
-        total = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.user_id == self.user_id,
-            Expense.category_id == self.category_id
-        ).scalar()
-        
-        return total or 0
+        #Total spent for this budget's category, computed once per instance
+        if '_spent_amount' not in self.__dict__:
+            from rollups import load_budget_rollups
+            load_budget_rollups([self])
+        return self.__dict__['_spent_amount']
+
+    def set_spent_amount(self, amount):
+        #Used by the rollup service to attach a precomputed total
+        self.__dict__['_spent_amount'] = amount or 0
 
     @property
     def variance(self):
@@ -117,12 +130,13 @@ class Budget(db.Model):
         return self.spent_amount > self.budgeted_amount
 
     def to_dict(self):
+        spent_amount = self.spent_amount
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'category': self.category.to_dict() if self.category else None,
+            'category': Category.get_cached(self.category_id),
             'budgeted_amount': float(self.budgeted_amount),
-            'spent_amount': float(self.spent_amount),
+            'spent_amount': float(spent_amount),
             'variance': round(self.variance, 2),
             'percentage_used': round(self.percentage_used, 2),
             'is_over_budget': self.is_over_budget,
@@ -162,7 +176,7 @@ class Expense(db.Model):
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'category_id': self.category.to_dict() if self.category else None,
+            'category_id': Category.get_cached(self.category_id),
             'description': self.description,
             'amount': float(self.amount),
             'expense_date': self.expense_date.isoformat(),
@@ -170,6 +184,73 @@ class Expense(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
+    @classmethod
+    def list_columns(cls):
+        #Columns selected by list endpoints that serialize rows without loading Expense objects
+        return (cls.id, cls.user_id, cls.category_id, cls.description, cls.amount,
+                cls.expense_date, cls.created_at, cls.updated_at)
+
+    @staticmethod
+    def row_to_dict(row):
+        #Same shape as to_dict(), built from a Row of list_columns()
+        return {
+            'id': row.id,
+            'user_id': row.user_id,
+            'category_id': Category.get_cached(row.category_id),
+            'description': row.description,
+            'amount': float(row.amount),
+            'expense_date': row.expense_date.isoformat(),
+            'created_at': row.created_at.isoformat(),
+            'updated_at': row.updated_at.isoformat()
+        }
+
+class ExpenseRollup(db.Model):
+    #Pre-aggregated spending per user, category and month, maintained by rollups.py
+    __tablename__ = 'expense_rollups'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), primary_key=True)
+    year_month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ExpenseRollup {self.user_id}/{self.category_id} {self.year_month}: ${self.total_amount}>'
+
+class DailyExpenseRollup(db.Model):
+    #Pre-aggregated spending per user and day, maintained by rollups.py
+    __tablename__ = 'daily_expense_rollups'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    expense_date = db.Column(db.Date, primary_key=True)
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyExpenseRollup {self.user_id} {self.expense_date}: ${self.total_amount}>'
+
+class BudgetState(db.Model):
+    #Running spent total per user and category, updated on every expense write by rollups.py
+    __tablename__ = 'budget_states'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), primary_key=True)
+    spent_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<BudgetState {self.user_id}/{self.category_id}: ${self.spent_amount}>'
+
+class UserDataVersion(db.Model):
+    #Per-user change counter, bumped by versions.py whenever a user's data is written
+    __tablename__ = 'user_data_versions'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserDataVersion {self.user_id}: {self.version}>'
+
 class Category(db.Model):
     __tablename__ = 'categories'
 
@@ -184,6 +265,43 @@ class Category(db.Model):
     def __repr__(self):
         return f'<Category {self.name}>'
 
+    @classmethod
+    def refresh_cache(cls):
+        #Load the whole (small, global) categories table into the process cache
+        categories = {category.id: category.to_dict() for category in cls.query.all()}
+        with _category_cache_lock:
+            _category_cache.clear()
+            _category_cache.update(categories)
+            _category_cache_expires[0] = time.monotonic() + CATEGORY_CACHE_TTL
+
+    @classmethod
+    def invalidate_cache(cls):
+        with _category_cache_lock:
+            _category_cache.clear()
+            _category_cache_expires[0] = 0.0
+
+    @classmethod
+    def _cache_is_stale(cls):
+        return not _category_cache or time.monotonic() >= _category_cache_expires[0]
+
+    @classmethod
+    def get_cached(cls, category_id):
+        #Serialized category without touching the session; reloads the cache on a miss
+        if category_id is None:
+            return None
+        cached = None if cls._cache_is_stale() else _category_cache.get(category_id)
+        if cached is None:
+            cls.refresh_cache()
+            cached = _category_cache.get(category_id)
+        return dict(cached) if cached else None
+
+    @classmethod
+    def all_cached(cls):
+        #All serialized categories ordered by name
+        if cls._cache_is_stale():
+            cls.refresh_cache()
+        return sorted((dict(category) for category in list(_category_cache.values())), key=lambda c: c['name'])
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -207,6 +325,8 @@ class Bill(db.Model):
         default='monthly'
     )
     paid_date = db.Column(db.Date, nullable=True)
+    overdue_since = db.Column(db.Date, nullable=True)  # Audit trail from jobs.mark_overdue_bills; status uses due_date
+    rolled_over = db.Column(db.Boolean, nullable=False, default=False, server_default=false())  # Next bill created
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -223,15 +343,35 @@ class Bill(db.Model):
     def status(self):
         if self.paid_date:
             return 'paid'
-        elif self.due_date < date.today():
+        elif self.is_overdue:
             return 'overdue'
         else:
             return 'upcoming'
 
-    @property
+    # Statuses accepted by status_filter
+    STATUSES = ('paid', 'overdue', 'upcoming')
+
+    @classmethod
+    def status_filter(cls, status, today=None):
+        #SQL predicate equivalent to the status property, usable with idx_user_due_date
+        today = today or date.today()
+        if status == 'paid':
+            return cls.paid_date.isnot(None)
+        if status == 'overdue':
+            return and_(cls.paid_date.is_(None), cls.due_date < today)
+        if status == 'upcoming':
+            return and_(cls.paid_date.is_(None), cls.due_date >= today)
+        raise ValueError(f"Unknown bill status: {status}")
+
+    @hybrid_property
     def is_overdue(self):
-        #True if bill is overdue and unpaid
-        return self.status == 'overdue'
+        #True if bill is unpaid and past its due date
+        return self.paid_date is None and self.due_date < date.today()
+
+    @is_overdue.expression
+    def is_overdue(cls):
+        #Same test in SQL, so filters agree with serialized bills and can use idx_user_due_date
+        return cls.status_filter('overdue')
 
     @property
     def days_until_due(self):
@@ -258,12 +398,13 @@ class Bill(db.Model):
         )
         db.session.add(payment)
 
-        #create the next recurring bill
+        #create the next recurring bill; rolled_over stops the job creating it again
         next_bill = None
         if self.recurring_type != 'one-time':
             next_bill = self.create_next_recurring_bill()
             if next_bill:
                 db.session.add(next_bill)
+            self.rolled_over = True
 
         return payment, next_bill
     
@@ -306,6 +447,7 @@ class Bill(db.Model):
             'due_date': self.due_date.isoformat(),
             'recurring_type': self.recurring_type,
             'paid_date': self.paid_date.isoformat() if self.paid_date else None,
+            'overdue_since': self.overdue_since.isoformat() if self.overdue_since else None,
             'status': self.status,
             'is_overdue': self.is_overdue,
             'days_until_due': self.days_until_due,
@@ -367,6 +509,7 @@ class Reminder(db.Model):
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    bill_id = db.Column(db.Integer, db.ForeignKey('bills.id', ondelete='SET NULL'), nullable=True)
     message = db.Column(db.Text, nullable=False)
     reminder_type = db.Column(db.Enum('budget_alert', 'bill_due', 'custom', name='reminder_types'), 
                              nullable=False)
@@ -377,6 +520,7 @@ class Reminder(db.Model):
     # Index for better query performance
     __table_args__ = (
         Index('idx_user_active', 'user_id', 'is_active'),
+        Index('idx_reminder_bill', 'bill_id'),
     )
 
     def __repr__(self):
@@ -391,6 +535,7 @@ class Reminder(db.Model):
         return {
             'id': self.id,
             'user_id': self.user_id,
+            'bill_id': self.bill_id,
             'message': self.message,
             'reminder_type': self.reminder_type,
             'is_active': self.is_active,
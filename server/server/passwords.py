@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+import time
+
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full or an operation times out; callers should answer 503"""
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a bounded thread pool.
+
+    bcrypt releases the GIL while it works, so a small pool caps how many
+    cores auth traffic can occupy. At most max_workers + max_queue operations
+    may be in flight; anything beyond that is rejected instead of queueing
+    behind a login burst. A slot is held until its operation actually finishes,
+    even when the caller has already given up waiting for it.
+    """
+
+    def __init__(self, rounds=12, max_workers=2, max_queue=32, timeout=10):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._stats = {
+            'operations': 0,
+            'rejected': 0,
+            'in_flight': 0,
+            'total_seconds': 0.0,
+            'max_seconds': 0.0,
+        }
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._stats['operations'] += 1
+                self._stats['total_seconds'] += elapsed
+                self._stats['max_seconds'] = max(self._stats['max_seconds'], elapsed)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise PasswordHasherBusy()
+
+        with self._lock:
+            self._stats['in_flight'] += 1
+        try:
+            future = self._executor.submit(self._timed, fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The job keeps running (and keeps its slot); the caller gets a 503
+            raise PasswordHasherBusy()
+
+    def _release(self):
+        with self._lock:
+            self._stats['in_flight'] -= 1
+        self._slots.release()
+
+    def hash(self, password):
+        return self._run(lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)))
+
+    def verify(self, password, password_hash):
+        if isinstance(password_hash, str):
+            password_hash = password_hash.encode('utf-8')
+        return self._run(lambda: bcrypt.checkpw(password.encode('utf-8'), password_hash))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['rounds'] = self.rounds
+        stats['average_seconds'] = stats['total_seconds'] / stats['operations'] if stats['operations'] else 0.0
+        return stats
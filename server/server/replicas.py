@@ -0,0 +1,92 @@
+import random
+import sqlite3
+import time
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+
+from caching import LRUCache, RedisCache
+
+# Prefix of the SQLALCHEMY_BINDS keys that hold read replicas
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica bind chosen for the current request.
+
+    Flushes always go to the primary, as does everything outside a request that
+    selected a replica (see ReplicaRouter.use_replica).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            bind_key = g.get('replica_bind')
+            if bind_key is not None:
+                return self._db.engines[bind_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_binds(urls, options_for):
+    """SQLALCHEMY_BINDS entries for a comma-separated list of replica URLs"""
+    binds = {}
+    for index, url in enumerate(url.strip() for url in urls.split(',') if url.strip()):
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = {'url': url, **options_for(url)}
+    return binds
+
+
+class ReplicaRouter:
+    """Chooses a replica for read-only requests, keeping recent writers on the primary.
+
+    After a user writes, their reads stay on the primary for sticky_seconds so
+    they always see their own changes despite replication lag. The marker lives
+    in its own store (see create_sticky_store), so a shared backend (Redis) makes
+    stickiness hold across worker processes.
+    """
+
+    def __init__(self, bind_keys, store, sticky_seconds=5):
+        self.bind_keys = list(bind_keys)
+        self.store = store
+        self.sticky_seconds = sticky_seconds
+
+    def mark_write(self, user_id):
+        if self.bind_keys:
+            self.store.set(f'primary-until:{user_id}', time.time() + self.sticky_seconds)
+
+    def is_sticky(self, user_id):
+        until = self.store.get(f'primary-until:{user_id}')
+        return until is not None and float(until) > time.time()
+
+    def use_replica(self, user_id):
+        """Route the rest of this request's reads to a replica; returns the bind key or None"""
+        if not self.bind_keys or self.is_sticky(user_id):
+            return None
+        g.replica_bind = random.choice(self.bind_keys)
+        return g.replica_bind
+
+
+def create_sticky_store(config):
+    """Build the read-your-writes marker store described by REPLICA_STICKY_* settings"""
+    backend_name = config['REPLICA_STICKY_BACKEND']
+    ttl = config['REPLICA_STICKY_SECONDS']
+    if backend_name == 'memory':
+        # Kept apart from the response cache so dashboard payloads never evict markers
+        return LRUCache(max(config['REPLICA_STICKY_SIZE'], 1), ttl)
+    if backend_name == 'redis':
+        return RedisCache(config['REPLICA_STICKY_URL'], ttl)
+    raise ValueError(f"Unknown REPLICA_STICKY_BACKEND: {backend_name}")
+
+
+def copy_sqlite_database(source_uri, target_uri):
+    """Copy one SQLite database file onto another with the online backup API"""
+    source_url, target_url = make_url(source_uri), make_url(target_uri)
+    if source_url.get_backend_name() != 'sqlite' or target_url.get_backend_name() != 'sqlite':
+        raise ValueError('Only SQLite databases can be copied')
+
+    source = sqlite3.connect(source_url.database)
+    target = sqlite3.connect(target_url.database)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
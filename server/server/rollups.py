@@ -0,0 +1,289 @@
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import event, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import raiseload
+
+from models import db, Budget, BudgetState, Expense, ExpenseRollup, DailyExpenseRollup
+
+# Rows written per INSERT when rebuilding rollups
+REBUILD_CHUNK_SIZE = 1000
+
+# Columns accumulated by the rollup upserts
+ROLLUP_COLUMNS = ('total_amount', 'expense_count')
+BUDGET_STATE_COLUMNS = ('spent_amount', 'expense_count')
+
+
+def year_month(day):
+    """Rollup key for the month containing a date"""
+    return day.strftime('%Y-%m')
+
+
+def get_spent_by_category(user_id, category_ids=None):
+    """Return {category_id: total spent} for a user from the budget state rows"""
+    query = db.session.query(
+        BudgetState.category_id,
+        BudgetState.spent_amount
+    ).filter(BudgetState.user_id == user_id)
+
+    if category_ids is not None:
+        query = query.filter(BudgetState.category_id.in_(category_ids))
+
+    return {category_id: total or 0 for category_id, total in query.all()}
+
+
+def get_monthly_totals(user_id, months):
+    """Return {year_month: total spent} for the requested months"""
+    rows = db.session.query(
+        ExpenseRollup.year_month,
+        func.sum(ExpenseRollup.total_amount)
+    ).filter(
+        ExpenseRollup.user_id == user_id,
+        ExpenseRollup.year_month.in_(months)
+    ).group_by(ExpenseRollup.year_month).all()
+
+    totals = {month: 0 for month in months}
+    totals.update({month: total or 0 for month, total in rows})
+    return totals
+
+
+def get_spent_since(user_id, month):
+    """Return the total spent from the start of a month on, later months included"""
+    # year_month keys are zero-padded, so string order is month order
+    return db.session.query(func.sum(ExpenseRollup.total_amount)).filter(
+        ExpenseRollup.user_id == user_id,
+        ExpenseRollup.year_month >= month
+    ).scalar() or 0
+
+
+def load_budget_rollups(budgets):
+    """Attach spent amounts to budgets with one aggregate query per user"""
+    budgets_by_user = defaultdict(list)
+    for budget in budgets:
+        budgets_by_user[budget.user_id].append(budget)
+
+    for user_id, user_budgets in budgets_by_user.items():
+        category_ids = {budget.category_id for budget in user_budgets}
+        spent = get_spent_by_category(user_id, category_ids)
+        for budget in user_budgets:
+            budget.set_spent_amount(spent.get(budget.category_id, 0))
+
+    return budgets
+
+
+def load_user_budgets(user_id):
+    """Load a user's budgets with spent amounts attached, in a single statement"""
+    # One primary-key lookup per budget, however many expenses the user has
+    rows = db.session.query(Budget, BudgetState.spent_amount).outerjoin(
+        BudgetState, (BudgetState.user_id == Budget.user_id) & (BudgetState.category_id == Budget.category_id)
+    ).filter(
+        Budget.user_id == user_id
+    ).options(raiseload(Budget.category)).order_by(Budget.id).all()
+
+    budgets = []
+    for budget, spent_amount in rows:
+        budget.set_spent_amount(spent_amount)
+        budgets.append(budget)
+    return budgets
+
+
+# --- Incremental maintenance ---
+class RollupDelta:
+    """Accumulates amount/count changes per rollup key before they are written"""
+
+    def __init__(self):
+        self.monthly = defaultdict(lambda: [Decimal('0'), 0])
+        self.daily = defaultdict(lambda: [Decimal('0'), 0])
+        self.budget = defaultdict(lambda: [Decimal('0'), 0])
+
+    def add(self, user_id, category_id, expense_date, amount, count=1):
+        amount = Decimal(str(amount))
+        monthly = self.monthly[(user_id, category_id, year_month(expense_date))]
+        monthly[0] += amount
+        monthly[1] += count
+        daily = self.daily[(user_id, expense_date)]
+        daily[0] += amount
+        daily[1] += count
+        budget = self.budget[(user_id, category_id)]
+        budget[0] += amount
+        budget[1] += count
+
+    def __bool__(self):
+        return bool(self.monthly or self.daily or self.budget)
+
+
+def upsert_increment(connection, table, keys, columns, rows):
+    """Add the given columns of each row onto existing rows matched by keys, inserting missing ones"""
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: table.c[column] + stmt.excluded[column] for column in columns}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # Generic fallback for dialects without ON CONFLICT support
+    for row in rows:
+        match = [table.c[key] == row[key] for key in keys]
+        result = connection.execute(
+            table.update().where(*match).values(
+                **{column: table.c[column] + row[column] for column in columns}
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def apply_rollup_delta(connection, delta):
+    """Write accumulated deltas and drop rollup rows that no longer hold expenses"""
+    if not delta:
+        return
+
+    monthly = ExpenseRollup.__table__
+    daily = DailyExpenseRollup.__table__
+    budget_state = BudgetState.__table__
+
+    if delta.monthly:
+        upsert_increment(connection, monthly, ['user_id', 'category_id', 'year_month'], ROLLUP_COLUMNS, [
+            {'user_id': user_id, 'category_id': category_id, 'year_month': month,
+             'total_amount': amount, 'expense_count': count}
+            for (user_id, category_id, month), (amount, count) in delta.monthly.items()
+        ])
+    if delta.daily:
+        upsert_increment(connection, daily, ['user_id', 'expense_date'], ROLLUP_COLUMNS, [
+            {'user_id': user_id, 'expense_date': expense_date,
+             'total_amount': amount, 'expense_count': count}
+            for (user_id, expense_date), (amount, count) in delta.daily.items()
+        ])
+
+    if delta.budget:
+        upsert_increment(connection, budget_state, ['user_id', 'category_id'], BUDGET_STATE_COLUMNS, [
+            {'user_id': user_id, 'category_id': category_id,
+             'spent_amount': amount, 'expense_count': count}
+            for (user_id, category_id), (amount, count) in delta.budget.items()
+        ])
+
+    user_ids = {key[0] for key in delta.monthly}
+    if any(count < 0 for _, count in delta.budget.values()):
+        connection.execute(budget_state.delete().where(
+            budget_state.c.user_id.in_(user_ids), budget_state.c.expense_count <= 0
+        ))
+    if any(count < 0 for _, count in delta.monthly.values()):
+        connection.execute(monthly.delete().where(
+            monthly.c.user_id.in_(user_ids), monthly.c.expense_count <= 0
+        ))
+    if any(count < 0 for _, count in delta.daily.values()):
+        connection.execute(daily.delete().where(
+            daily.c.user_id.in_(user_ids), daily.c.expense_count <= 0
+        ))
+
+
+def _previous_value(expense, attr):
+    #Value as last persisted, even if it was changed in this flush
+    history = inspect(expense).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(expense, attr)
+
+
+def _expense_changed(expense):
+    state = inspect(expense)
+    return any(
+        state.attrs[attr].history.has_changes()
+        for attr in ('user_id', 'category_id', 'amount', 'expense_date')
+    )
+
+
+@event.listens_for(db.session, 'after_flush')
+def maintain_expense_rollups(session, flush_context):
+    """Keep rollup tables in step with expense inserts, edits and deletes"""
+    delta = RollupDelta()
+
+    for obj in session.new:
+        if isinstance(obj, Expense):
+            delta.add(obj.user_id, obj.category_id, obj.expense_date, obj.amount)
+
+    for obj in session.dirty:
+        if isinstance(obj, Expense) and _expense_changed(obj):
+            delta.add(
+                _previous_value(obj, 'user_id'),
+                _previous_value(obj, 'category_id'),
+                _previous_value(obj, 'expense_date'),
+                -Decimal(str(_previous_value(obj, 'amount'))),
+                count=-1
+            )
+            delta.add(obj.user_id, obj.category_id, obj.expense_date, obj.amount)
+
+    for obj in session.deleted:
+        if isinstance(obj, Expense):
+            delta.add(
+                _previous_value(obj, 'user_id'),
+                _previous_value(obj, 'category_id'),
+                _previous_value(obj, 'expense_date'),
+                -Decimal(str(_previous_value(obj, 'amount'))),
+                count=-1
+            )
+
+    apply_rollup_delta(session.connection(), delta)
+
+
+# --- Rebuild ---
+def rebuild_rollups(user_id=None):
+    """Recompute rollup and budget state tables from expenses; returns (monthly, daily) row counts"""
+    monthly = ExpenseRollup.__table__
+    daily = DailyExpenseRollup.__table__
+    budget_state = BudgetState.__table__
+
+    deletes = [monthly.delete(), daily.delete(), budget_state.delete()]
+    if user_id is not None:
+        deletes = [stmt.where(stmt.table.c.user_id == user_id) for stmt in deletes]
+    for stmt in deletes:
+        db.session.execute(stmt)
+
+    query = db.session.query(
+        Expense.user_id,
+        Expense.category_id,
+        Expense.expense_date,
+        func.sum(Expense.amount),
+        func.count(Expense.id)
+    )
+    if user_id is not None:
+        query = query.filter(Expense.user_id == user_id)
+    query = query.group_by(Expense.user_id, Expense.category_id, Expense.expense_date)
+
+    delta = RollupDelta()
+    for row_user_id, category_id, expense_date, amount, count in query.yield_per(REBUILD_CHUNK_SIZE):
+        delta.add(row_user_id, category_id, expense_date, amount, count)
+
+    monthly_rows = [
+        {'user_id': key[0], 'category_id': key[1], 'year_month': key[2],
+         'total_amount': amount, 'expense_count': count}
+        for key, (amount, count) in delta.monthly.items()
+    ]
+    daily_rows = [
+        {'user_id': key[0], 'expense_date': key[1],
+         'total_amount': amount, 'expense_count': count}
+        for key, (amount, count) in delta.daily.items()
+    ]
+    budget_rows = [
+        {'user_id': key[0], 'category_id': key[1],
+         'spent_amount': amount, 'expense_count': count}
+        for key, (amount, count) in delta.budget.items()
+    ]
+    for start in range(0, len(budget_rows), REBUILD_CHUNK_SIZE):
+        db.session.execute(budget_state.insert(), budget_rows[start:start + REBUILD_CHUNK_SIZE])
+    for start in range(0, len(monthly_rows), REBUILD_CHUNK_SIZE):
+        db.session.execute(monthly.insert(), monthly_rows[start:start + REBUILD_CHUNK_SIZE])
+    for start in range(0, len(daily_rows), REBUILD_CHUNK_SIZE):
+        db.session.execute(daily.insert(), daily_rows[start:start + REBUILD_CHUNK_SIZE])
+
+    # Rebuilt totals feed cached responses and ETags; versions imports this module
+    from versions import bump_data_versions
+    user_ids = {key[0] for key in delta.monthly} | ({user_id} if user_id is not None else set())
+    bump_data_versions(db.session.connection(), user_ids)
+
+    db.session.commit()
+    return len(monthly_rows), len(daily_rows)
@@ -10,7 +10,7 @@ import bcrypt
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import app
-from models import db, User, Category, Budget, Expense, Bill, BillPayment, Reminder
+from models import db, User, Category, Budget, Expense, Bill, BillPayment, Reminder, BudgetState, ExpenseRollup, DailyExpenseRollup, UserDataVersion
 
 def clear_database():
     """Clear all existing data from the database"""
@@ -18,6 +18,10 @@ def clear_database():
     
     # Delete in reverse order of dependencies
     db.session.query(Reminder).delete()
+    db.session.query(UserDataVersion).delete()
+    db.session.query(BudgetState).delete()
+    db.session.query(DailyExpenseRollup).delete()
+    db.session.query(ExpenseRollup).delete()
     db.session.query(BillPayment).delete()
     db.session.query(Bill).delete()
     db.session.query(Expense).delete()
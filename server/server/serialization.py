@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used without it
+    orjson = None
+
+
+def _default(obj):
+    #Types orjson does not handle natively
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson: compact by default and several times faster than json"""
+
+    mimetype = 'application/json'
+
+    def __init__(self, app, pretty=False):
+        super().__init__(app)
+        self.option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self.option | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """Stdlib provider that serializes Decimals as numbers, like OrjsonProvider"""
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return DefaultJSONProvider.default(obj)
+
+
+def create_json_provider(app):
+    """Build the provider selected by JSON_PROVIDER (orjson or default)"""
+    name = app.config['JSON_PROVIDER']
+    pretty = app.config['JSON_PRETTY']
+    if name == 'orjson':
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER=orjson requires the 'orjson' package")
+        return OrjsonProvider(app, pretty=pretty)
+    if name == 'default':
+        provider = CompactJSONProvider(app)
+        provider.compact = not pretty
+        return provider
+    raise ValueError(f"Unknown JSON_PROVIDER: {name}")
+
+
+def default_json_provider():
+    return 'orjson' if orjson is not None else 'default'
+
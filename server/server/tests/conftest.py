@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The server modules import each other by bare name (`from models import db`)
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    # app.py reads its configuration and builds its caches at import time,
+    # so every test gets a fresh import bound to its own database
+    sys.modules.pop('app', None)
+    from app import app as flask_app
+    from models import db, Category
+
+    with flask_app.app_context():
+        db.create_all()
+    Category.invalidate_cache()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
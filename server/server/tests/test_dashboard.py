@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from dashboard import DASHBOARD_QUERY_COUNT
+from models import db, User, Category, Budget, Expense, Bill
+
+# Statements /dashboard adds around build_dashboard: the user's data version,
+# read once for the ETag and the response cache key
+REQUEST_OVERHEAD_QUERIES = 1
+
+
+def create_user_data(rows, today):
+    user = User(username='dash', email='dash@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+
+    categories = [Category(name=f'Category {i}') for i in range(rows)]
+    db.session.add_all(categories)
+    db.session.flush()
+
+    for i, category in enumerate(categories):
+        db.session.add(Budget(user_id=user.id, category_id=category.id, budgeted_amount=100))
+        db.session.add(Expense(
+            user_id=user.id, category_id=category.id, description=f'Expense {i}',
+            amount=10 + i, expense_date=today - timedelta(days=i % 20)
+        ))
+        # Alternate overdue and upcoming bills
+        due = today - timedelta(days=i + 1) if i % 2 else today + timedelta(days=i % 7)
+        db.session.add(Bill(user_id=user.id, name=f'Bill {i}', amount=5, category='Utilities', due_date=due))
+    db.session.commit()
+    return user
+
+
+def count_statements(app, client, path, headers):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return response, statements
+
+
+@pytest.mark.parametrize('rows', [1, 25])
+def test_dashboard_query_count_is_constant(app, client, rows):
+    # The dashboard reads the wall clock, so the data is laid out around it
+    today = date.today()
+    with app.app_context():
+        user = create_user_data(rows, today)
+        headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=user.email, additional_claims={'uid': user.id}
+        )}
+
+    # Warm the per-process user and category caches, as any earlier request would
+    assert client.get('/budgets', headers=headers).status_code == 200
+
+    response, statements = count_statements(app, client, '/dashboard', headers)
+
+    assert response.status_code == 200
+    assert len(statements) == DASHBOARD_QUERY_COUNT + REQUEST_OVERHEAD_QUERIES, statements
+    data = response.get_json()['data']
+    assert len(data['budgets']) == rows
+    assert len(data['recent_expenses']) == min(rows, 10)
+    assert len(data['overdue_bills']) + len(data['upcoming_bills']) == rows
@@ -0,0 +1,42 @@
+from sqlalchemy import event, select
+
+from models import db, Budget, Bill, BillPayment, Expense, Reminder, UserDataVersion
+from rollups import upsert_increment
+
+# Models whose rows belong to a single user and feed that user's API responses
+VERSIONED_MODELS = (Budget, Bill, BillPayment, Expense, Reminder)
+
+
+def get_data_version(user_id):
+    """Current change counter for a user (0 if they have never written anything).
+
+    Always read from the primary: a lagging replica would hand back an old
+    version and answer 304 for data the user has just changed.
+    """
+    version = db.session.execute(
+        select(UserDataVersion.version).where(UserDataVersion.user_id == user_id),
+        bind_arguments={'bind': db.engine}
+    ).scalar()
+    return version or 0
+
+
+def bump_data_versions(connection, user_ids):
+    """Increment the change counter of every given user"""
+    if not user_ids:
+        return
+    upsert_increment(connection, UserDataVersion.__table__, ['user_id'], ['version'], [
+        {'user_id': user_id, 'version': 1} for user_id in user_ids
+    ])
+
+
+@event.listens_for(db.session, 'after_flush')
+def bump_versions_on_write(session, flush_context):
+    """Bump the counter of every user whose rows were inserted, changed or deleted"""
+    user_ids = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, VERSIONED_MODELS):
+            user_ids.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj):
+            user_ids.add(obj.user_id)
+    bump_data_versions(session.connection(), user_ids)